@@ -7,17 +7,25 @@ It loads the LangFlow JSON configuration and uses it to create a chatbot that ma
 and provides budget and timeline estimates.
 """
 
+import asyncio
+import contextlib
+import functools
 import json
 import os
 import logging
+import re
+import time
 import uuid
-from typing import Dict, List, Optional, Any
+from collections import OrderedDict
+from operator import itemgetter
+from typing import Dict, List, Optional, Any, Set
 
+import orjson
+import tiktoken
 import uvicorn
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request, Depends, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, HTTPException
+from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
@@ -31,17 +39,15 @@ from langchain_core.chat_history import BaseChatMessageHistory
 from langchain_community.chat_message_histories import ChatMessageHistory
 
 # Import our tools
-from src.backend.tools import BudgetTimelineTool, StoreLeadTool
+from src.backend.chat_history import IncrementalChatMessageHistory
+from src.backend.tools import budget_timeline_tool, store_lead_tool
+from src.backend.logging_config import configure_logging
 
 # Load environment variables
 load_dotenv()
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='[%(asctime)s] [%(levelname)s] [%(name)s] - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Get OpenAI API key from environment variables
@@ -53,36 +59,16 @@ if not OPENAI_API_KEY:
 # Create FastAPI app
 app = FastAPI(title="Presales Chatbot")
 
-# Create templates directory if it doesn't exist
-os.makedirs("templates", exist_ok=True)
-
-# Create templates
-templates = Jinja2Templates(directory="templates")
-
-# Create static directory if it doesn't exist
-os.makedirs("static", exist_ok=True)
-os.makedirs("static/css", exist_ok=True)
-os.makedirs("static/js", exist_ok=True)
-
-# Mount static files
+# Mount static files; static/ ships with the repository, along with the chat page
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 # Load LangFlow JSON configuration
+@functools.lru_cache(maxsize=1)
 def load_langflow_config():
     with open("src/langflow/flows/presales_chatbot_flow.json", "r") as file:
         return json.load(file)
 
-# Extract components from LangFlow JSON
-def build_chain_from_langflow(flow_config, session_id: str):
-    # Find the system prompt
-    system_prompt = None
-    for node in flow_config["data"]["nodes"]:
-        if node["id"] == "system_prompt":
-            system_prompt = node["data"]["template"]
-            break
-    
-    if not system_prompt:
-        system_prompt = """You are a pre-sales assistant for a software development company. Your role is to:
+DEFAULT_SYSTEM_PROMPT = """You are a pre-sales assistant for a software development company. Your role is to:
 
 1. Collect lead information (name, contact, project details)
 2. Identify the project type
@@ -101,716 +87,441 @@ IMPORTANT GUIDELINES:
 7. At the end of the conversation, summarize all collected information in bullet points.
 8. Ask for confirmation and follow-up consent.
 9. Thank the client for their time and interest."""
+
+# Extract the chain settings from the LangFlow JSON once, in a single pass over the nodes
+def extract_flow_settings(flow_config):
+    nodes = {node["id"]: node for node in flow_config["data"]["nodes"]}
     
-    # Find the LLM model configuration
-    model_name = "gpt-4o-mini"
-    temperature = 0.7
-    max_tokens = 1024
-    
-    for node in flow_config["data"]["nodes"]:
-        if node["id"] == "llm_model":
-            model_name = node["data"]["model_name"]
-            temperature = node["data"]["temperature"]
-            max_tokens = node["data"]["max_tokens"]
-            break
+    settings = {
+        "system_prompt": DEFAULT_SYSTEM_PROMPT,
+        "model_name": "gpt-4o-mini",
+        "temperature": 0.7,
+        "max_tokens": 1024
+    }
     
-    # Create chat message history
-    chat_history = ChatMessageHistory()
+    system_prompt_node = nodes.get("system_prompt")
+    if system_prompt_node and system_prompt_node["data"].get("template"):
+        settings["system_prompt"] = system_prompt_node["data"]["template"]
     
-    # Create LLM
-    llm = ChatOpenAI(
-        model_name=model_name,
-        temperature=temperature,
-        max_tokens=max_tokens,
-        api_key=OPENAI_API_KEY
-    )
+    llm_node = nodes.get("llm_model")
+    if llm_node:
+        settings["model_name"] = llm_node["data"]["model_name"]
+        settings["temperature"] = llm_node["data"]["temperature"]
+        settings["max_tokens"] = llm_node["data"]["max_tokens"]
     
-    # Create prompt template
-    prompt = PromptTemplate.from_template(
-        system_prompt + "\n\nConversation History:\n{memory}\n\nUser: {input}\n\nAI:"
-    )
+    return settings
+
+FLOW_SETTINGS = extract_flow_settings(load_langflow_config())
+
+# Create the LLM once and share it (and its HTTP connection pool) across all sessions
+LLM = ChatOpenAI(
+    model_name=FLOW_SETTINGS["model_name"],
+    temperature=FLOW_SETTINGS["temperature"],
+    max_tokens=FLOW_SETTINGS["max_tokens"],
+    api_key=OPENAI_API_KEY
+)
+
+# Create prompt template
+PROMPT = PromptTemplate.from_template(
+    FLOW_SETTINGS["system_prompt"] + "\n\nConversation History:\n{memory}\n\nUser: {input}\n\nAI:"
+)
+
+PARSER = StrOutputParser()
+
+# Session-independent part of the chain
+BASE_CHAIN = PROMPT | LLM | PARSER
+
+# Maximum number of tokens of conversation history included in the prompt
+MAX_MEMORY_TOKENS = int(os.getenv('MEMORY_TOKEN_BUDGET', '1500'))
+
+# Maximum number of messages kept per session
+MAX_HISTORY_MESSAGES = int(os.getenv('MAX_HISTORY_MESSAGES', '200'))
+
+# Tokenizer used to measure the history window
+try:
+    TOKEN_ENCODING = tiktoken.encoding_for_model(FLOW_SETTINGS["model_name"])
+except KeyError:
+    TOKEN_ENCODING = tiktoken.get_encoding("cl100k_base")
+
+# Chat message history with this chatbot's tokenizer, limits and transcript prefixes
+class PresalesChatMessageHistory(IncrementalChatMessageHistory):
+    token_encoding = TOKEN_ENCODING
+    max_memory_tokens = MAX_MEMORY_TOKENS
+    max_messages = MAX_HISTORY_MESSAGES
+    role_prefixes = {"human": "User: ", "ai": "AI: "}
+
+# Extract components from LangFlow JSON
+def build_chain_from_langflow(session_id: str):
+    # Create chat message history
+    chat_history = PresalesChatMessageHistory()
     
     # Create a function to get memory
     def get_memory(input_dict):
-        messages = chat_history.messages
-        if not messages:
-            return ""
-        
-        # Format messages as a string
-        formatted_messages = []
-        for message in messages:
-            if isinstance(message, HumanMessage):
-                formatted_messages.append(f"User: {message.content}")
-            elif isinstance(message, AIMessage):
-                formatted_messages.append(f"AI: {message.content}")
-        
-        return "\n".join(formatted_messages)
-    
-    # Create tools
-    budget_timeline_tool = BudgetTimelineTool()
-    store_lead_tool = StoreLeadTool()
+        return chat_history.memory
     
     # Create chain using the modern RunnableSequence approach
     chain = (
         {
             "memory": get_memory,
-            "input": lambda x: x["input"]
+            "input": itemgetter("input")
         }
-        | prompt
-        | llm
-        | StrOutputParser()
+        | BASE_CHAIN
     )
     
-    # Return both the chain and chat history
+    # Return the chain and chat history; the turn lock lets a session answer one
+    # message at a time, even across several connections
     return {
         "chain": chain, 
         "chat_history": chat_history,
+        "turn_lock": asyncio.Lock(),
         "tools": {
             "budget_timeline_tool": budget_timeline_tool,
             "store_lead_tool": store_lead_tool
         }
     }
 
+# Common project types mentioned in conversations
+PROJECT_TYPES = [
+    "e-commerce website", "mobile app", "web application", 
+    "desktop application", "API integration", "CRM system",
+    "content management system", "database design", "data migration",
+    "AI/ML solution", "chatbot", "automation tool"
+]
+PROJECT_TYPES_BY_LOWER = {project_type.lower(): project_type for project_type in PROJECT_TYPES}
+
+# Single alternation over all project types (longest first, so overlapping names prefer the longer one)
+PROJECT_TYPE_PATTERN = re.compile(
+    "|".join(re.escape(project_type) for project_type in sorted(PROJECT_TYPES, key=len, reverse=True)),
+    re.IGNORECASE
+)
+
+# Keywords in a user message that trigger the Budget & Timeline Tool
+ESTIMATE_TRIGGER_PATTERN = re.compile(
+    r"\b(?:budget(?:s|ed|ing)?|timelines?|estimat(?:e|es|ed|ing|ion|ions)|cost(?:s|ing|ly)?)\b",
+    re.IGNORECASE
+)
+
+# Minimum number of messages before lead information is stored
+MIN_LEAD_MESSAGES = 6
+
+# Phrases that signal the end of the conversation
+ENDING_PATTERN = re.compile(r"thank you|thanks for your help|that's all|goodbye|bye", re.IGNORECASE)
+
+# Phrases that signal the client agrees to be contacted
+CONSENT_PATTERN = re.compile(r"follow up|contact me|reach out", re.IGNORECASE)
+
+# Reply sent with the Budget & Timeline Tool result
+ESTIMATE_REPLY_TEMPLATE = (
+    "I've checked our database for {project_type} projects. Here's what I found:\n\n"
+    "- Budget Range: {budget_range}\n"
+    "- Typical Timeline: {typical_timeline}\n\n"
+    "These are typical ranges based on our past projects. The actual budget and timeline "
+    "may vary depending on your specific requirements."
+)
+
+# Patterns used to extract lead information from the conversation
+NAME_PATTERNS = [
+    re.compile(r"my name is ([A-Za-z\s]+)", re.IGNORECASE),
+    re.compile(r"I'm ([A-Za-z\s]+)", re.IGNORECASE),
+    re.compile(r"I am ([A-Za-z\s]+)", re.IGNORECASE),
+    re.compile(r"([A-Za-z\s]+) here", re.IGNORECASE)
+]
+EMAIL_PATTERN = re.compile(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
+PHONE_PATTERN = re.compile(r"(\+\d{1,3}[\s-]?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}")
+
+# Session limits for the connection manager
+MAX_SESSIONS = int(os.getenv('MAX_SESSIONS', '1000'))
+SESSION_TTL_SECONDS = int(os.getenv('SESSION_TTL_SECONDS', '3600'))
+
 # Connection manager for WebSockets
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
-        self.chat_chains: Dict[str, object] = {}
+        # A client can be connected more than once, e.g. from two tabs sharing a session
+        self.active_connections: Dict[str, Set[WebSocket]] = {}
+        # Chains ordered from least to most recently used
+        self.chat_chains: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.chain_locks: Dict[str, asyncio.Lock] = {}
     
     async def connect(self, websocket: WebSocket, client_id: str):
         await websocket.accept()
-        self.active_connections[client_id] = websocket
+        self.active_connections.setdefault(client_id, set()).add(websocket)
         
         # Create a new chain for this client if it doesn't exist
-        if client_id not in self.chat_chains:
-            flow_config = load_langflow_config()
-            self.chat_chains[client_id] = build_chain_from_langflow(flow_config, client_id)
+        await self.get_or_create_chain(client_id)
     
-    def disconnect(self, client_id: str):
-        if client_id in self.active_connections:
-            del self.active_connections[client_id]
+    async def get_or_create_chain(self, client_id: str):
+        """Get the chain for a client, creating it exactly once per client."""
+        chain_data = self.chat_chains.get(client_id)
+        if chain_data is not None:
+            self.touch_session(client_id)
+            return chain_data
+        
+        # setdefault runs without yielding to the event loop, so all callers share one lock
+        lock = self.chain_locks.setdefault(client_id, asyncio.Lock())
+        async with lock:
+            chain_data = self.chat_chains.get(client_id)
+            if chain_data is None:
+                self.evict_idle_sessions()
+                chain_data = build_chain_from_langflow(client_id)
+                self.chat_chains[client_id] = chain_data
+            self.touch_session(client_id)
         
-        # Keep the chain in memory for now
-        # In a production environment, you might want to clean up after some time
+        return chain_data
     
-    async def send_message(self, message: str, client_id: str):
-        if client_id in self.active_connections:
-            await self.active_connections[client_id].send_text(message)
+    def touch_session(self, client_id: str):
+        """Mark a session as most recently used."""
+        self.chat_chains[client_id]["last_seen"] = time.monotonic()
+        self.chat_chains.move_to_end(client_id)
     
-    async def process_message(self, message: str, client_id: str):
-        if client_id not in self.chat_chains:
-            flow_config = load_langflow_config()
-            self.chat_chains[client_id] = build_chain_from_langflow(flow_config, client_id)
-        
-        chain_data = self.chat_chains[client_id]
-        chain = chain_data["chain"]
-        chat_history = chain_data["chat_history"]
-        tools = chain_data["tools"]
+    def evict_idle_sessions(self):
+        """Drop expired sessions, and the least recently used ones beyond MAX_SESSIONS."""
+        now = time.monotonic()
         
-        try:
-            # Add user message to history
-            chat_history.add_user_message(message)
-            
-            # Check if we need to call a tool
-            if "budget" in message.lower() or "timeline" in message.lower() or "estimate" in message.lower() or "cost" in message.lower():
-                # Extract project type from the conversation
-                project_type = self.extract_project_type(chat_history)
-                if project_type:
-                    # Call the Budget & Timeline Tool
-                    tool_response = tools["budget_timeline_tool"]._run(project_type)
-                    # Add tool response to history
-                    tool_message = f"I've checked our database for {project_type} projects. Here's what I found:\n\n" \
-                                  f"- Budget Range: {tool_response['budget_range']}\n" \
-                                  f"- Typical Timeline: {tool_response['typical_timeline']}\n\n" \
-                                  f"These are typical ranges based on our past projects. The actual budget and timeline " \
-                                  f"may vary depending on your specific requirements."
-                    chat_history.add_ai_message(tool_message)
-                    return tool_message
-            
-            # Check if we need to store lead information
-            if self.should_store_lead(message, chat_history):
-                lead_info = self.extract_lead_info(chat_history)
-                if lead_info.get("name") and lead_info.get("contact"):
-                    # Call the Store Lead Tool
-                    tools["store_lead_tool"]._run(**lead_info)
-            
-            # Invoke the chain with the input
-            response = chain.invoke({"input": message})
+        for client_id in list(self.chat_chains):
+            over_capacity = len(self.chat_chains) >= MAX_SESSIONS
+            expired = now - self.chat_chains[client_id]["last_seen"] > SESSION_TTL_SECONDS
+            if not over_capacity and not expired:
+                # Sessions are ordered by last use, so the rest are newer
+                break
             
-            # Add AI response to history
-            chat_history.add_ai_message(response)
+            # Never drop the chain of a client that is still connected
+            if client_id in self.active_connections:
+                continue
             
-            return response
-        except Exception as e:
-            logger.error(f"Error processing message: {e}")
-            return f"I'm sorry, I encountered an error: {str(e)}"
+            del self.chat_chains[client_id]
+            self.chain_locks.pop(client_id, None)
+            logger.info(f"Evicted idle session {client_id}")
     
-    def extract_project_type(self, chat_history):
-        """Extract project type from conversation history."""
-        # Combine all messages into a single string
-        all_messages = "\n".join([msg.content for msg in chat_history.messages])
+    def disconnect(self, websocket: WebSocket, client_id: str):
+        connections = self.active_connections.get(client_id)
+        if connections is not None:
+            connections.discard(websocket)
+            if not connections:
+                del self.active_connections[client_id]
         
-        # Look for common project types
-        project_types = [
-            "e-commerce website", "mobile app", "web application", 
-            "desktop application", "API integration", "CRM system",
-            "content management system", "database design", "data migration",
-            "AI/ML solution", "chatbot", "automation tool"
-        ]
+        # Keep the chain in memory so the client can reconnect; idle sessions
+        # are evicted once they expire or the session limit is reached
+        if client_id in self.chat_chains:
+            self.touch_session(client_id)
+    
+    async def send_message(self, message: Dict[str, Any], websocket: WebSocket):
+        # orjson encodes much faster than the stdlib json used by send_json
+        await websocket.send_text(orjson.dumps(message).decode())
+    
+    async def process_message(self, messages: List[str], client_id: str):
+        """
+        Process one or more user messages, yielding the response text as it is generated.
         
-        for project_type in project_types:
-            if project_type.lower() in all_messages.lower():
-                return project_type
+        Messages that queued up while the previous reply was being generated are
+        recorded one by one, then answered together.
+        """
+        chain_data = await self.get_or_create_chain(client_id)
+        chain = chain_data["chain"]
+        chat_history = chain_data["chat_history"]
+        tools = chain_data["tools"]
+        message = "\n".join(messages)
         
-        return None
+        # Wait for any turn of this session that is still being answered, so the history stays in order
+        async with chain_data["turn_lock"]:
+            try:
+                # Add the user messages to history
+                for user_message in messages:
+                    chat_history.add_user_message(user_message)
+                
+                # Check if we need to call a tool
+                if ESTIMATE_TRIGGER_PATTERN.search(message):
+                    # Extract project type from the conversation
+                    project_type = self.extract_project_type(chain_data)
+                    if project_type:
+                        # Call the Budget & Timeline Tool; estimates are served from the database module's
+                        # in-memory cache, which add_project_estimate and ESTIMATE_CACHE_TTL keep current
+                        tool_response = await tools["budget_timeline_tool"]._arun(project_type)
+                        # Add tool response to history
+                        tool_message = ESTIMATE_REPLY_TEMPLATE.format(
+                            project_type=project_type,
+                            budget_range=tool_response["budget_range"],
+                            typical_timeline=tool_response["typical_timeline"]
+                        )
+                        chat_history.add_ai_message(tool_message)
+                        yield tool_message
+                        return
+                
+                # Store lead information once a long enough conversation is ending;
+                # shorter conversations skip the history scan entirely
+                if len(chat_history.messages) >= MIN_LEAD_MESSAGES and ENDING_PATTERN.search(message):
+                    lead_info = self.extract_lead_info(chain_data)
+                    if lead_info:
+                        # Call the Store Lead Tool
+                        await tools["store_lead_tool"]._arun(**lead_info)
+                
+                # Stream the chain output as it arrives
+                response_chunks = []
+                async for chunk in chain.astream({"input": message}):
+                    response_chunks.append(chunk)
+                    yield chunk
+                
+                # Add AI response to history
+                chat_history.add_ai_message("".join(response_chunks))
+            except Exception as e:
+                logger.error(f"Error processing message: {e}")
+                yield f"I'm sorry, I encountered an error: {str(e)}"
     
-    def should_store_lead(self, message, chat_history):
-        """Determine if we should store lead information."""
-        # Check if we have enough messages
-        if len(chat_history.messages) < 6:
-            return False
+    def scan_history(self, chain_data):
+        """Scan the conversation history once for everything the lead pipeline needs."""
+        chat_history = chain_data["chat_history"]
+        # The newest message identifies the history's state; the message count stops
+        # changing once the history is trimmed to MAX_HISTORY_MESSAGES
+        newest_message = chat_history.messages[-1] if chat_history.messages else None
         
-        # Check if the conversation is ending
-        ending_phrases = ["thank you", "thanks for your help", "that's all", "goodbye", "bye"]
-        for phrase in ending_phrases:
-            if phrase in message.lower():
-                return True
+        # Reuse the scan while the history hasn't changed
+        cached = chain_data.get("scan")
+        if cached and cached[0] is newest_message:
+            return cached[1]
         
-        return False
-    
-    def extract_lead_info(self, chat_history):
-        """Extract lead information from conversation history."""
+        # Combine all messages into a single string
         all_messages = "\n".join([msg.content for msg in chat_history.messages])
         
-        # Initialize lead info
-        lead_info = {
+        scan = {
+            "all_messages": all_messages,
+            "project_type": None,
+            "project_type_end": None,
             "name": None,
             "contact": None,
-            "project_type": None,
-            "project_details": None,
-            "estimated_budget": None,
-            "estimated_timeline": None,
             "follow_up_consent": False
         }
         
-        # Extract name (look for patterns like "my name is [name]" or "I'm [name]")
-        import re
-        name_patterns = [
-            r"my name is ([A-Za-z\s]+)",
-            r"I'm ([A-Za-z\s]+)",
-            r"I am ([A-Za-z\s]+)",
-            r"([A-Za-z\s]+) here"
-        ]
+        # Look for common project types in a single pass
+        match = PROJECT_TYPE_PATTERN.search(all_messages)
+        if match:
+            scan["project_type"] = PROJECT_TYPES_BY_LOWER[match.group(0).lower()]
+            scan["project_type_end"] = match.end()
         
-        for pattern in name_patterns:
-            match = re.search(pattern, all_messages, re.IGNORECASE)
+        # Extract name (look for patterns like "my name is [name]" or "I'm [name]")
+        for pattern in NAME_PATTERNS:
+            match = pattern.search(all_messages)
             if match:
-                lead_info["name"] = match.group(1).strip()
+                scan["name"] = match.group(1).strip()
                 break
         
         # Extract contact (email or phone)
-        email_pattern = r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}"
-        phone_pattern = r"(\+\d{1,3}[\s-]?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}"
-        
-        email_match = re.search(email_pattern, all_messages)
+        email_match = EMAIL_PATTERN.search(all_messages)
         if email_match:
-            lead_info["contact"] = email_match.group(0)
+            scan["contact"] = email_match.group(0)
         else:
-            phone_match = re.search(phone_pattern, all_messages)
+            phone_match = PHONE_PATTERN.search(all_messages)
             if phone_match:
-                lead_info["contact"] = phone_match.group(0)
+                scan["contact"] = phone_match.group(0)
         
-        # Extract project type
-        lead_info["project_type"] = self.extract_project_type(chat_history)
+        # Check for follow-up consent
+        scan["follow_up_consent"] = CONSENT_PATTERN.search(all_messages) is not None
         
-        # Extract project details (everything after project type mention)
-        if lead_info["project_type"]:
-            project_type_index = all_messages.lower().find(lead_info["project_type"].lower())
-            if project_type_index > 0:
-                details_text = all_messages[project_type_index + len(lead_info["project_type"]):]
-                # Limit to 500 characters
-                lead_info["project_details"] = details_text[:500].strip()
+        chain_data["scan"] = (newest_message, scan)
+        return scan
+    
+    def extract_project_type(self, chain_data):
+        """Extract project type from conversation history."""
+        return self.scan_history(chain_data)["project_type"]
+    
+    def extract_lead_info(self, chain_data):
+        """Extract lead information from conversation history, or None without a name and contact."""
+        scan = self.scan_history(chain_data)
+        if not scan["name"] or not scan["contact"]:
+            return None
         
-        # Check for follow-up consent
-        consent_phrases = ["yes, you can follow up", "follow up", "contact me", "reach out"]
-        for phrase in consent_phrases:
-            if phrase in all_messages.lower():
-                lead_info["follow_up_consent"] = True
-                break
+        lead_info = {
+            "name": scan["name"],
+            "contact": scan["contact"],
+            "project_type": scan["project_type"],
+            "project_details": None,
+            "estimated_budget": None,
+            "estimated_timeline": None,
+            "follow_up_consent": scan["follow_up_consent"]
+        }
+        
+        # Extract project details (everything after project type mention, limited to 500 characters)
+        project_type_end = scan["project_type_end"]
+        if project_type_end is not None:
+            lead_info["project_details"] = scan["all_messages"][project_type_end:project_type_end + 500].strip()
         
         return lead_info
 
 # Create connection manager
 manager = ConnectionManager()
 
-# HTML template for the chat interface
-@app.get("/", response_class=HTMLResponse)
-async def get_chat_page(request: Request):
-    # Create HTML template if it doesn't exist
-    html_template = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Presales Chatbot</title>
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <!-- Add Marked.js for Markdown rendering -->
-        <script src="https://cdn.jsdelivr.net/npm/marked/marked.min.js"></script>
-        <style>
-            :root {
-                --primary-color: #4a6fa5;
-                --secondary-color: #e6f7ff;
-                --background-color: #f5f5f5;
-                --card-background: #ffffff;
-                --text-color: #333333;
-                --message-user-bg: #e6f7ff;
-                --message-bot-bg: #f0f0f0;
-                --input-border: #dddddd;
-                --code-background: #f8f8f8;
-                --accent-color: #5d87c6;
-                --success-color: #4caf50;
-                --warning-color: #ff9800;
-                --error-color: #f44336;
-            }
-            
-            [data-theme="dark"] {
-                --primary-color: #5d87c6;
-                --secondary-color: #2c3e50;
-                --background-color: #1a1a1a;
-                --card-background: #2d2d2d;
-                --text-color: #f0f0f0;
-                --message-user-bg: #2c3e50;
-                --message-bot-bg: #3d3d3d;
-                --input-border: #444444;
-                --code-background: #383838;
-                --accent-color: #7fa9e9;
-                --success-color: #81c784;
-                --warning-color: #ffb74d;
-                --error-color: #e57373;
-            }
-            
-            body {
-                font-family: Arial, sans-serif;
-                margin: 0;
-                padding: 0;
-                display: flex;
-                justify-content: center;
-                align-items: center;
-                min-height: 100vh;
-                background-color: var(--background-color);
-                color: var(--text-color);
-                transition: all 0.3s ease;
-            }
-            
-            .chat-container {
-                width: 90%;
-                max-width: 800px;
-                height: 90vh;
-                border-radius: 10px;
-                overflow: hidden;
-                box-shadow: 0 0 10px rgba(0,0,0,0.1);
-                display: flex;
-                flex-direction: column;
-                background-color: var(--card-background);
-            }
-            
-            .chat-header {
-                background-color: var(--primary-color);
-                color: white;
-                padding: 15px;
-                text-align: center;
-                display: flex;
-                justify-content: space-between;
-                align-items: center;
-            }
-            
-            .theme-toggle {
-                background: none;
-                border: none;
-                color: white;
-                cursor: pointer;
-                font-size: 1.2rem;
-            }
-            
-            .chat-messages {
-                flex: 1;
-                padding: 15px;
-                overflow-y: auto;
-                background-color: var(--card-background);
-            }
-            
-            .message {
-                margin-bottom: 15px;
-                padding: 12px;
-                border-radius: 8px;
-                max-width: 80%;
-                word-wrap: break-word;
-                position: relative;
-                animation: fadeIn 0.3s ease;
-            }
-            
-            @keyframes fadeIn {
-                from { opacity: 0; transform: translateY(10px); }
-                to { opacity: 1; transform: translateY(0); }
-            }
-            
-            .user-message {
-                background-color: var(--message-user-bg);
-                margin-left: auto;
-                color: var(--text-color);
-            }
-            
-            .bot-message {
-                background-color: var(--message-bot-bg);
-                margin-right: auto;
-                color: var(--text-color);
-            }
-            
-            .typing-indicator {
-                display: none;
-                background-color: var(--message-bot-bg);
-                margin-right: auto;
-                padding: 12px;
-                border-radius: 8px;
-                margin-bottom: 15px;
-            }
-            
-            .typing-indicator span {
-                height: 8px;
-                width: 8px;
-                background-color: var(--text-color);
-                display: inline-block;
-                border-radius: 50%;
-                margin-right: 5px;
-                animation: typing 1s infinite;
-            }
-            
-            .typing-indicator span:nth-child(2) {
-                animation-delay: 0.2s;
-            }
-            
-            .typing-indicator span:nth-child(3) {
-                animation-delay: 0.4s;
-                margin-right: 0;
-            }
-            
-            @keyframes typing {
-                0% { transform: translateY(0); }
-                50% { transform: translateY(-5px); }
-                100% { transform: translateY(0); }
-            }
-            
-            /* Add styles for Markdown content */
-            .bot-message img {
-                max-width: 100%;
-                height: auto;
-                margin: 10px 0;
-                border-radius: 5px;
-            }
-            
-            .bot-message h1, .bot-message h2, .bot-message h3, .bot-message h4 {
-                margin-top: 10px;
-                margin-bottom: 5px;
-                color: var(--text-color);
-            }
-            
-            .bot-message ul, .bot-message ol {
-                margin-left: 20px;
-            }
-            
-            .bot-message code {
-                background-color: var(--code-background);
-                padding: 2px 4px;
-                border-radius: 3px;
-                font-family: monospace;
-            }
-            
-            .bot-message pre {
-                background-color: var(--code-background);
-                padding: 10px;
-                border-radius: 5px;
-                overflow-x: auto;
-            }
-            
-            .bot-message table {
-                border-collapse: collapse;
-                width: 100%;
-                margin: 10px 0;
-            }
-            
-            .bot-message th, .bot-message td {
-                border: 1px solid var(--input-border);
-                padding: 8px;
-                text-align: left;
-            }
-            
-            .bot-message th {
-                background-color: var(--primary-color);
-                color: white;
-            }
-            
-            .chat-input {
-                display: flex;
-                padding: 15px;
-                background-color: var(--card-background);
-                border-top: 1px solid var(--input-border);
-            }
-            
-            .chat-input input {
-                flex: 1;
-                padding: 12px;
-                border: 1px solid var(--input-border);
-                border-radius: 5px;
-                margin-right: 10px;
-                background-color: var(--card-background);
-                color: var(--text-color);
-            }
-            
-            .chat-input button {
-                padding: 12px 20px;
-                background-color: var(--primary-color);
-                color: white;
-                border: none;
-                border-radius: 5px;
-                cursor: pointer;
-                transition: background-color 0.3s;
-            }
-            
-            .chat-input button:hover {
-                background-color: var(--accent-color);
-            }
-            
-            .error-message {
-                background-color: #ffdddd;
-                color: #ff0000;
-                padding: 10px;
-                margin: 10px 0;
-                border-radius: 5px;
-                text-align: center;
-                display: none;
-            }
-            
-            /* Welcome message */
-            .welcome-message {
-                background-color: var(--primary-color);
-                color: white;
-                padding: 15px;
-                border-radius: 8px;
-                margin-bottom: 15px;
-                text-align: center;
-            }
-            
-            /* Responsive design */
-            @media (max-width: 768px) {
-                .chat-container {
-                    width: 95%;
-                    height: 95vh;
-                }
-                
-                .message {
-                    max-width: 90%;
-                }
-            }
-        </style>
-    </head>
-    <body>
-        <div class="chat-container">
-            <div class="chat-header">
-                <h2>Presales Assistant</h2>
-                <button class="theme-toggle" id="theme-toggle">🌓</button>
-            </div>
-            <div class="chat-messages" id="chat-messages">
-                <div class="welcome-message">
-                    <h3>Welcome to our Presales Assistant!</h3>
-                    <p>I'm here to help you with your project needs. I can provide budget and timeline estimates, and collect your information to help our team follow up with you.</p>
-                    <p>How can I assist you today?</p>
-                </div>
-            </div>
-            <div class="typing-indicator" id="typing-indicator">
-                <span></span>
-                <span></span>
-                <span></span>
-            </div>
-            <div class="error-message" id="error-message">
-                An error occurred. <button id="retry-button">Retry</button>
-            </div>
-            <div class="chat-input">
-                <input type="text" id="user-input" placeholder="Type your message here...">
-                <button id="send-button">Send</button>
-            </div>
-        </div>
-
-        <script>
-            // Theme toggle functionality
-            const themeToggle = document.getElementById('theme-toggle');
-            const body = document.body;
-            
-            // Check for saved theme preference or use preferred color scheme
-            const savedTheme = localStorage.getItem('theme') || 
-                (window.matchMedia('(prefers-color-scheme: dark)').matches ? 'dark' : 'light');
-            
-            // Apply the theme
-            if (savedTheme === 'dark') {
-                body.setAttribute('data-theme', 'dark');
-            }
-            
-            // Toggle theme
-            themeToggle.addEventListener('click', () => {
-                if (body.getAttribute('data-theme') === 'dark') {
-                    body.removeAttribute('data-theme');
-                    localStorage.setItem('theme', 'light');
-                } else {
-                    body.setAttribute('data-theme', 'dark');
-                    localStorage.setItem('theme', 'dark');
-                }
-            });
-            
-            // Generate a unique client ID
-            const clientId = Date.now().toString();
-            
-            // WebSocket connection
-            let socket;
-            let reconnectAttempts = 0;
-            const maxReconnectAttempts = 3;
-            
-            function connectWebSocket() {
-                socket = new WebSocket(`ws://${window.location.host}/ws/${clientId}`);
-                
-                // WebSocket event handlers
-                socket.onopen = () => {
-                    console.log('WebSocket connected');
-                    document.getElementById('error-message').style.display = 'none';
-                    reconnectAttempts = 0;
-                };
-                
-                socket.onmessage = (event) => {
-                    document.getElementById('typing-indicator').style.display = 'none';
-                    addMessage(event.data, 'bot');
-                };
-                
-                socket.onclose = (event) => {
-                    console.log('WebSocket closed:', event);
-                    if (reconnectAttempts < maxReconnectAttempts) {
-                        reconnectAttempts++;
-                        setTimeout(connectWebSocket, 1000 * reconnectAttempts);
-                    } else {
-                        document.getElementById('error-message').style.display = 'block';
-                    }
-                };
-                
-                socket.onerror = (error) => {
-                    console.error('WebSocket error:', error);
-                    document.getElementById('error-message').style.display = 'block';
-                };
-            }
-            
-            // Initial connection
-            connectWebSocket();
-            
-            // DOM elements
-            const chatMessages = document.getElementById('chat-messages');
-            const userInput = document.getElementById('user-input');
-            const sendButton = document.getElementById('send-button');
-            const retryButton = document.getElementById('retry-button');
-            const typingIndicator = document.getElementById('typing-indicator');
-            
-            // Retry connection
-            retryButton.addEventListener('click', () => {
-                document.getElementById('error-message').style.display = 'none';
-                reconnectAttempts = 0;
-                connectWebSocket();
-            });
-            
-            // Send message function
-            function sendMessage() {
-                const message = userInput.value.trim();
-                if (message) {
-                    // Add user message to chat
-                    addMessage(message, 'user');
-                    
-                    // Show typing indicator
-                    typingIndicator.style.display = 'block';
-                    
-                    // Send message to server if socket is open
-                    if (socket.readyState === WebSocket.OPEN) {
-                        socket.send(message);
-                    } else {
-                        document.getElementById('error-message').style.display = 'block';
-                        typingIndicator.style.display = 'none';
-                    }
-                    
-                    // Clear input
-                    userInput.value = '';
-                }
-            }
-            
-            // Add message to chat
-            function addMessage(message, sender) {
-                const messageElement = document.createElement('div');
-                messageElement.classList.add('message');
-                messageElement.classList.add(sender === 'user' ? 'user-message' : 'bot-message');
-                
-                // If it's a bot message, render markdown
-                if (sender === 'bot') {
-                    messageElement.innerHTML = marked.parse(message);
-                    
-                    // Make links open in new tab
-                    const links = messageElement.querySelectorAll('a');
-                    links.forEach(link => {
-                        link.setAttribute('target', '_blank');
-                        link.setAttribute('rel', 'noopener noreferrer');
-                    });
-                } else {
-                    messageElement.textContent = message;
-                }
-                
-                chatMessages.appendChild(messageElement);
-                
-                // Scroll to bottom
-                chatMessages.scrollTop = chatMessages.scrollHeight;
-            }
-            
-            // Event listeners
-            sendButton.addEventListener('click', sendMessage);
-            userInput.addEventListener('keypress', (e) => {
-                if (e.key === 'Enter') {
-                    sendMessage();
-                }
-            });
-            
-            // Focus input on page load
-            window.onload = () => {
-                userInput.focus();
-            };
-        </script>
-    </body>
-    </html>
-    """
-    
-    # Write HTML template to file
-    with open("templates/presales_chat.html", "w") as file:
-        file.write(html_template)
-    
-    return templates.TemplateResponse("presales_chat.html", {"request": request})
+# HTML page for the chat interface
+@app.get("/")
+async def get_chat_page():
+    return FileResponse(
+        "static/presales_chat.html",
+        media_type="text/html",
+        headers={"Cache-Control": "public, max-age=300"}
+    )
+
+# Maximum number of received messages waiting to be answered for one client
+MESSAGE_QUEUE_SIZE = int(os.getenv('MESSAGE_QUEUE_SIZE', '8'))
+
+def drain_queue(queue: asyncio.Queue, first: str) -> List[str]:
+    """Return a message together with every message already queued behind it."""
+    messages = [first]
+    while not queue.empty():
+        messages.append(queue.get_nowait())
+    return messages
+
+async def answer_messages(queue: asyncio.Queue, websocket: WebSocket, client_id: str):
+    """Answer the messages queued on one connection in order, streaming each response back to it."""
+    try:
+        while True:
+            # A lone message is answered right away; a backlog that built up during
+            # the previous reply is answered in one turn
+            messages = drain_queue(queue, await queue.get())
+            
+            # Process messages and stream the response back to the client; aclosing releases
+            # the session's turn lock right away if this task is cancelled mid-reply
+            async with contextlib.aclosing(manager.process_message(messages, client_id)) as response:
+                async for chunk in response:
+                    await manager.send_message({"type": "chunk", "content": chunk}, websocket)
+            
+            # Let the client know the response is complete
+            await manager.send_message({"type": "done"}, websocket)
+    except Exception:
+        # Returning ends the connection; see websocket_endpoint
+        logger.exception(f"Error answering client {client_id}")
+
+async def receive_messages(websocket: WebSocket, queue: asyncio.Queue):
+    """Put the client's messages on the queue until it disconnects."""
+    while True:
+        # Blocks while the queue is full, which stops reading from the socket
+        await queue.put(await websocket.receive_text())
 
 # WebSocket endpoint for chat
 @app.websocket("/ws/{client_id}")
 async def websocket_endpoint(websocket: WebSocket, client_id: str):
     await manager.connect(websocket, client_id)
     
+    # Answer in a separate task so messages sent during a reply are queued rather than left unread
+    queue: asyncio.Queue = asyncio.Queue(maxsize=MESSAGE_QUEUE_SIZE)
+    receiver = asyncio.create_task(receive_messages(websocket, queue))
+    worker = asyncio.create_task(answer_messages(queue, websocket, client_id))
+    
     try:
-        while True:
-            # Receive message from client
-            data = await websocket.receive_text()
-            
-            # Process message
-            response = await manager.process_message(data, client_id)
-            
-            # Send response back to client
-            await manager.send_message(response, client_id)
-            
+        # Run until the client disconnects or answering fails, whichever comes first
+        await asyncio.wait({receiver, worker}, return_when=asyncio.FIRST_COMPLETED)
+        
+        if receiver.done():
+            receiver.result()
+        else:
+            # The worker failed, so nothing would answer this client any more
+            with contextlib.suppress(Exception):
+                await websocket.close(code=1011)
     except WebSocketDisconnect:
-        manager.disconnect(client_id)
         logger.info(f"Client {client_id} disconnected")
+    except Exception:
+        logger.exception(f"Error receiving from client {client_id}")
+    finally:
+        manager.disconnect(websocket, client_id)
+        receiver.cancel()
+        worker.cancel()
+        await asyncio.wait({receiver, worker})
 
 # Run the app
 if __name__ == "__main__":
@@ -6,22 +6,24 @@ This script runs the FastAPI application.
 """
 
 import logging
-import uvicorn
-from src.backend.config import API_HOST, API_PORT, DEBUG
+from src.backend.logging_config import configure_logging
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='[%(asctime)s] [%(levelname)s] [%(name)s] - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 if __name__ == "__main__":
-    logger.info(f"Starting server on {API_HOST}:{API_PORT} (debug={DEBUG})")
+    # Imported here so that importing this module stays cheap
+    import uvicorn
+    from src.backend.config import API_HOST, API_PORT, API_WORKERS, DEBUG
+    
+    # Reload only works with a single worker, so use multiple workers outside debug mode
+    workers = 1 if DEBUG else API_WORKERS
+    logger.info(f"Starting server on {API_HOST}:{API_PORT} (debug={DEBUG}, workers={workers})")
     uvicorn.run(
         "src.backend.main:app",
         host=API_HOST,
         port=API_PORT,
-        reload=DEBUG
+        reload=DEBUG,
+        workers=workers
     ) 
\ No newline at end of file
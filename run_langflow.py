@@ -7,7 +7,6 @@ This script runs LangFlow locally and registers our custom tools.
 
 import os
 import logging
-import subprocess
 import sys
 from dotenv import load_dotenv
 
@@ -16,16 +15,13 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 # Import our tools registration module
 from src.langflow.langflow_tools import register_tools
+from src.backend.logging_config import configure_logging
 
 # Load environment variables
 load_dotenv()
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='[%(asctime)s] [%(levelname)s] [%(name)s] - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Get LangFlow configuration from environment variables
@@ -45,15 +41,18 @@ if __name__ == "__main__":
     logger.info(f"Starting LangFlow on {LANGFLOW_HOST}:{LANGFLOW_PORT}")
     
     try:
-        # Run LangFlow
-        subprocess.run([
-            "langflow", "run",
-            "--host", LANGFLOW_HOST,
-            "--port", LANGFLOW_PORT
-        ], check=True)
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Error running LangFlow: {e}")
-    except FileNotFoundError:
+        from langflow.__main__ import main as langflow_main
+    except ImportError:
         logger.error("LangFlow not found. Make sure it's installed with 'pip install langflow'")
+        sys.exit(1)
+    
+    # Run the LangFlow CLI in this process, sharing the tools registered above
+    sys.argv = [
+        "langflow", "run",
+        "--host", LANGFLOW_HOST,
+        "--port", LANGFLOW_PORT
+    ]
+    try:
+        langflow_main()
     except KeyboardInterrupt:
-        logger.info("LangFlow stopped by user") 
\ No newline at end of file
+        logger.info("LangFlow stopped by user")
@@ -5,6 +5,7 @@ Run tests script for the pre-sales chatbot.
 This script runs the tests for the pre-sales chatbot.
 """
 
+import importlib.util
 import pytest
 import sys
 import os
@@ -13,5 +14,11 @@ if __name__ == "__main__":
     # Add the current directory to the path
     sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
     
+    args = ["-v", "tests"]
+    # Spread test files across one worker per CPU when pytest-xdist is installed;
+    # loadfile keeps each file's tests on the same worker
+    if importlib.util.find_spec("xdist") is not None:
+        args[1:1] = ["-n", "auto", "--dist", "loadfile"]
+    
     # Run the tests
-    pytest.main(["-v", "tests"]) 
\ No newline at end of file
+    pytest.main(args) 
\ No newline at end of file
@@ -5,29 +5,24 @@ Run script for LangFlow Memory Chatbot Web Interface.
 This script runs both the backend API and the web interface for the memory chatbot.
 """
 
+import atexit
 import os
 import logging
-import asyncio
 import subprocess
 import sys
-import threading
+import time
+import urllib.request
 from dotenv import load_dotenv
+from src.backend.logging_config import configure_logging
 
 # Add the project root to the Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-# Import the web interface
-from web_interface import app as web_app
-
 # Load environment variables
 load_dotenv()
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='[%(asctime)s] [%(levelname)s] [%(name)s] - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Get configuration from environment variables
@@ -35,24 +30,73 @@ BACKEND_HOST = os.getenv('BACKEND_HOST', '0.0.0.0')
 BACKEND_PORT = int(os.getenv('BACKEND_PORT', '8001'))
 WEB_HOST = os.getenv('WEB_HOST', '0.0.0.0')
 WEB_PORT = int(os.getenv('WEB_PORT', '8000'))
+BACKEND_STARTUP_TIMEOUT = float(os.getenv('BACKEND_STARTUP_TIMEOUT', '30'))
 
-def run_backend():
-    """Run the backend API."""
+def start_backend():
+    """
+    Start the backend API as a child process.
+    
+    Returns:
+        subprocess.Popen: The backend process
+    """
     logger.info(f"Starting backend API on {BACKEND_HOST}:{BACKEND_PORT}")
+    # run.py reads its host and port from the environment
+    env = {**os.environ, "API_HOST": BACKEND_HOST, "API_PORT": str(BACKEND_PORT)}
+    run_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "run.py")
+    # Own session so Ctrl-C reaches only this process, which then stops the backend itself
+    return subprocess.Popen([sys.executable, run_script], env=env, start_new_session=True)
+
+def stop_backend(backend):
+    """
+    Stop the backend API process if it is still running.
+    
+    Args:
+        backend (subprocess.Popen): The backend process
+    """
+    if backend.poll() is not None:
+        return
+    logger.info("Stopping backend API")
+    backend.terminate()
     try:
-        subprocess.run([
-            "python", "run.py",
-            "--host", BACKEND_HOST,
-            "--port", str(BACKEND_PORT)
-        ], check=True)
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Error running backend API: {e}")
-    except KeyboardInterrupt:
-        logger.info("Backend API stopped by user")
+        backend.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        logger.warning("Backend API did not stop in time, killing it")
+        backend.kill()
+
+def wait_for_backend(backend, timeout=BACKEND_STARTUP_TIMEOUT):
+    """
+    Wait until the backend API answers its health check.
+    
+    Args:
+        backend (subprocess.Popen): The backend process
+        timeout (float): How long to wait in seconds
+        
+    Returns:
+        bool: True if the backend is ready, False if it exited or timed out
+    """
+    url = f"http://127.0.0.1:{BACKEND_PORT}/api/health"
+    start = time.monotonic()
+    deadline = start + timeout
+    while time.monotonic() < deadline:
+        if backend.poll() is not None:
+            logger.error(f"Backend API exited with code {backend.returncode}")
+            return False
+        try:
+            with urllib.request.urlopen(url, timeout=0.2) as response:
+                if response.status == 200:
+                    logger.info(f"Backend API ready after {time.monotonic() - start:.2f}s")
+                    return True
+        except OSError:
+            pass
+        time.sleep(0.05)
+    logger.warning(f"Backend API not ready after {timeout:.0f}s")
+    return False
 
 def run_web_interface():
     """Run the web interface."""
     import uvicorn
+    # Imported here so importing this script does not build the chat app
+    from web_interface import app as web_app
     logger.info(f"Starting web interface on {WEB_HOST}:{WEB_PORT}")
     try:
         uvicorn.run(web_app, host=WEB_HOST, port=WEB_PORT)
@@ -62,10 +106,13 @@ def run_web_interface():
 if __name__ == "__main__":
     logger.info("Starting Memory Chatbot")
     
-    # Start the backend API in a separate thread
-    backend_thread = threading.Thread(target=run_backend)
-    backend_thread.daemon = True
-    backend_thread.start()
+    # Start the backend API as a child process and make sure it goes down with us
+    backend = start_backend()
+    atexit.register(stop_backend, backend)
+    wait_for_backend(backend)
     
-    # Run the web interface in the main thread
-    run_web_interface() 
\ No newline at end of file
+    # Run the web interface in the main process
+    try:
+        run_web_interface()
+    finally:
+        stop_backend(backend)
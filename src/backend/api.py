@@ -4,12 +4,17 @@ API module for the pre-sales chatbot.
 This module defines the API endpoints for the pre-sales chatbot.
 """
 
+import hashlib
 import logging
-from fastapi import APIRouter, HTTPException, Query, Depends
-from pydantic import BaseModel, Field
+from datetime import datetime
+import orjson
+from fastapi import APIRouter, HTTPException, Query, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, Field, TypeAdapter
 from typing import Optional, List
 from .database import get_estimate_by_project_type, store_lead, get_all_leads
-from .tools import get_estimate
+from .tools import aget_estimate
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -18,6 +23,13 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+class OrjsonResponse(JSONResponse):
+    """JSON response serialized with orjson, used as the app's default response class."""
+    
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
 class LeadCreate(BaseModel):
     """
     Model for creating a lead.
@@ -65,8 +77,8 @@ class Lead(BaseModel):
         estimated_budget (str, optional): The estimated budget range
         estimated_timeline (str, optional): The estimated timeline
         follow_up_consent (bool): Whether the lead has consented to follow-up
-        created_at (str): The creation timestamp
-        updated_at (str): The last update timestamp
+        created_at (datetime): The creation timestamp
+        updated_at (datetime): The last update timestamp
     """
     id: int
     name: str
@@ -76,8 +88,8 @@ class Lead(BaseModel):
     estimated_budget: Optional[str] = None
     estimated_timeline: Optional[str] = None
     follow_up_consent: bool
-    created_at: str
-    updated_at: str
+    created_at: datetime
+    updated_at: datetime
 
 
 class LeadsResponse(BaseModel):
@@ -90,6 +102,13 @@ class LeadsResponse(BaseModel):
     leads: List[Lead]
 
 
+# Serializer for the leads response, built once instead of per request
+_LEADS_ADAPTER = TypeAdapter(LeadsResponse)
+
+# Estimates rarely change, so clients and proxies may reuse them for a while
+ESTIMATE_CACHE_CONTROL = "public, max-age=300"
+
+
 class EstimateResponse(BaseModel):
     """
     Model for estimate response.
@@ -114,39 +133,64 @@ async def health_check():
     Returns:
         dict: A dictionary with the status
     """
-    logger.info("Health check requested")
+    logger.debug("Health check requested")
     return {"status": "ok"}
 
 
 @router.get("/estimates", response_model=EstimateResponse, tags=["Estimates"])
-async def get_estimates(project_type: str = Query(..., description="The type of project")):
+async def get_estimates(request: Request, project_type: str = Query(..., description="The type of project")):
     """
     Get budget and timeline estimates for a project type.
     
     Args:
+        request (Request): The request object
         project_type (str): The type of project
         
     Returns:
-        EstimateResponse: The budget and timeline estimates
+        EstimateResponse: The budget and timeline estimates, with caching headers
     """
-    logger.info(f"Estimate requested for project type: {project_type}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Estimate requested for project type: {project_type}")
     
     if not project_type:
         logger.warning("Missing project_type parameter")
         raise HTTPException(status_code=400, detail="Missing project_type parameter")
     
-    estimate = get_estimate(project_type)
+    estimate = await aget_estimate(project_type)
     
     if not estimate:
         logger.warning(f"No estimate found for project type: {project_type}")
-        return EstimateResponse(
+        result = EstimateResponse(
             project_type="unknown",
             budget_range="Requires more information",
             typical_timeline="Requires more information",
             message="We need more details about your project to provide an accurate estimate."
         )
+    else:
+        result = EstimateResponse(**estimate)
+    
+    return _cacheable_response(request, result.model_dump())
+
+
+def _cacheable_response(request: Request, content: dict) -> Response:
+    """
+    Build a JSON response with a weak ETag and Cache-Control header.
     
-    return EstimateResponse(**estimate)
+    Args:
+        request (Request): The request, checked for a matching If-None-Match header
+        content (dict): The response content
+        
+    Returns:
+        Response: An empty 304 response if the client's copy is current, otherwise the content
+    """
+    etag = f'W/"{hashlib.blake2b(orjson.dumps(content), digest_size=8).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": ESTIMATE_CACHE_CONTROL}
+    
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    
+    return OrjsonResponse(content, headers=headers)
 
 
 @router.post("/leads", response_model=LeadResponse, tags=["Leads"])
@@ -162,7 +206,8 @@ async def create_lead(lead: LeadCreate):
     """
     logger.info(f"Lead creation requested for: {lead.name}")
     
-    lead_id = store_lead(
+    lead_id = await run_in_threadpool(
+        store_lead,
         name=lead.name,
         contact=lead.contact,
         project_type=lead.project_type,
@@ -181,19 +226,29 @@ async def create_lead(lead: LeadCreate):
 
 
 @router.get("/leads", response_model=LeadsResponse, tags=["Leads"])
-async def get_leads():
+async def get_leads(
+    limit: int = Query(100, ge=1, le=1000, description="The maximum number of leads to return"),
+    offset: int = Query(0, ge=0, description="The number of leads to skip")
+):
     """
-    Get all leads.
+    Get a page of leads.
+    
+    Args:
+        limit (int): The maximum number of leads to return
+        offset (int): The number of leads to skip
     
     Returns:
         LeadsResponse: The response with the list of leads
     """
-    logger.info("Leads requested")
+    logger.info(f"Leads requested (limit={limit}, offset={offset})")
     
-    leads = get_all_leads()
+    leads = await run_in_threadpool(get_all_leads, limit=limit, offset=offset)
     
     if leads is None:
         logger.error("Failed to get leads")
         raise HTTPException(status_code=500, detail="Failed to get leads")
     
-    return LeadsResponse(leads=leads) 
\ No newline at end of file
+    # Rows come straight from the database, so build the models without validating them
+    # and serialize them with the prebuilt adapter; response_model is only used for the docs
+    response = LeadsResponse.model_construct(leads=[Lead.model_construct(**lead) for lead in leads])
+    return Response(content=_LEADS_ADAPTER.dump_json(response), media_type="application/json")
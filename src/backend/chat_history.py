@@ -0,0 +1,74 @@
+"""
+Chat message history for the chatbot web interfaces.
+
+This module provides the token-bounded message history shared by web_interface.py and
+presales_web_interface.py.
+"""
+
+from collections import deque
+from typing import Any, ClassVar, Deque, Dict, Optional
+
+from langchain_core.messages import BaseMessage
+from langchain_community.chat_message_histories import ChatMessageHistory
+from pydantic import PrivateAttr
+
+
+class IncrementalChatMessageHistory(ChatMessageHistory):
+    """
+    Chat message history that keeps a token-bounded transcript of the most recent messages.
+
+    The formatted transcript is kept up to date as messages are added, and `messages` keeps
+    the last max_messages messages. Each chatbot subclasses this to set its tokenizer, limits
+    and transcript prefixes.
+    """
+
+    # Tokenizer used to measure the transcript window
+    token_encoding: ClassVar[Any] = None
+    # Maximum number of tokens of recent conversation in the transcript
+    max_memory_tokens: ClassVar[int] = 1500
+    # Maximum number of messages kept
+    max_messages: ClassVar[int] = 200
+    # Transcript prefixes by message type; other message types are left out of the transcript
+    role_prefixes: ClassVar[Dict[str, str]] = {"human": "Human: ", "ai": "AI: "}
+
+    _lines: Deque[str] = PrivateAttr(default_factory=deque)
+    _token_counts: Deque[int] = PrivateAttr(default_factory=deque)
+    _total_tokens: int = PrivateAttr(default=0)
+    _memory: Optional[str] = PrivateAttr(default="")
+
+    def add_message(self, message: BaseMessage) -> None:
+        super().add_message(message)
+        if len(self.messages) > self.max_messages:
+            del self.messages[:-self.max_messages]
+
+        prefix = self.role_prefixes.get(message.type)
+        if prefix is None:
+            return
+
+        line = prefix + message.content
+        token_count = len(self.token_encoding.encode(line))
+        self._lines.append(line)
+        self._token_counts.append(token_count)
+        self._total_tokens += token_count
+
+        # Drop the oldest lines until the window fits the budget (always keep the newest line)
+        while self._total_tokens > self.max_memory_tokens and len(self._lines) > 1:
+            self._lines.popleft()
+            self._total_tokens -= self._token_counts.popleft()
+
+        # Rebuilt lazily on the next read
+        self._memory = None
+
+    def clear(self) -> None:
+        super().clear()
+        self._lines.clear()
+        self._token_counts.clear()
+        self._total_tokens = 0
+        self._memory = ""
+
+    @property
+    def memory(self) -> str:
+        """The transcript of the most recent messages, one line per message."""
+        if self._memory is None:
+            self._memory = "\n".join(self._lines)
+        return self._memory
@@ -11,13 +11,6 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    level=os.getenv('LOG_LEVEL', 'INFO'),
-    format='[%(asctime)s] [%(levelname)s] [%(name)s] - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S',
-    filename=os.getenv('LOG_FILE', None)
-)
 logger = logging.getLogger(__name__)
 
 # Database configuration
@@ -27,6 +20,10 @@ DB_PATH = os.getenv('DB_PATH', 'sqlite:///database.db')
 API_HOST = os.getenv('API_HOST', '0.0.0.0')
 API_PORT = int(os.getenv('API_PORT', '5000'))
 DEBUG = os.getenv('DEBUG', 'False').lower() in ('true', '1', 't')
+# Number of worker processes (ignored in debug mode, where reload needs a single process)
+API_WORKERS = int(os.getenv('WEB_CONCURRENCY', str(os.cpu_count() or 1)))
+# Worker threads per process for blocking calls made from request handlers
+THREADPOOL_SIZE = int(os.getenv('THREADPOOL_SIZE', '200'))
 
 # LangFlow configuration
 LANGFLOW_API_KEY = os.getenv('LANGFLOW_API_KEY', '')
@@ -37,11 +34,15 @@ LANGFLOW_PORT = int(os.getenv('LANGFLOW_PORT', '7860'))
 LITELLM_API_KEY = os.getenv('LITELLM_API_KEY', '')
 LITELLM_MODEL = os.getenv('LITELLM_MODEL', 'gpt-4o-mini')
 
-# Log configuration settings
-logger.info("Configuration loaded:")
-logger.info(f"API_HOST: {API_HOST}")
-logger.info(f"API_PORT: {API_PORT}")
-logger.info(f"DEBUG: {DEBUG}")
-logger.info(f"LANGFLOW_HOST: {LANGFLOW_HOST}")
-logger.info(f"LANGFLOW_PORT: {LANGFLOW_PORT}")
-logger.info(f"LITELLM_MODEL: {LITELLM_MODEL}") 
\ No newline at end of file
+
+def log_settings():
+    """Log the configuration settings; called once logging has been configured."""
+    logger.info("Configuration loaded:")
+    logger.info(f"API_HOST: {API_HOST}")
+    logger.info(f"API_PORT: {API_PORT}")
+    logger.info(f"DEBUG: {DEBUG}")
+    logger.info(f"API_WORKERS: {API_WORKERS}")
+    logger.info(f"THREADPOOL_SIZE: {THREADPOOL_SIZE}")
+    logger.info(f"LANGFLOW_HOST: {LANGFLOW_HOST}")
+    logger.info(f"LANGFLOW_PORT: {LANGFLOW_PORT}")
+    logger.info(f"LITELLM_MODEL: {LITELLM_MODEL}")
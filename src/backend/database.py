@@ -6,29 +6,91 @@ This module defines the database models and utility functions for interacting wi
 
 import os
 import logging
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, DateTime, Text
-from sqlalchemy.orm import declarative_base, sessionmaker
+from typing import Optional
+from sqlalchemy import create_engine, event, inspect, select, Integer, String, Boolean, DateTime, Text
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, scoped_session, sessionmaker
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='[%(asctime)s] [%(levelname)s] [%(name)s] - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+# Logging is configured by the application entry points
 logger = logging.getLogger(__name__)
 
 # Get database path from environment variables
 DB_PATH = os.getenv('DB_PATH', 'sqlite:///database.db')
 
 # Create engine and session
-engine = create_engine(DB_PATH)
-Session = sessionmaker(bind=engine)
-Base = declarative_base()
+if DB_PATH.startswith('sqlite'):
+    # Connections are checked out from worker threads, not just the one that opened them
+    engine = create_engine(DB_PATH, connect_args={"check_same_thread": False})
+    
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Use WAL so readers don't block writers, and skip the fsync on every commit."""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.close()
+else:
+    engine = create_engine(DB_PATH)
+# Thread-local sessions; objects stay usable after commit, so reading generated IDs needs no extra query
+Session = scoped_session(sessionmaker(bind=engine, expire_on_commit=False))
+
+
+class Base(DeclarativeBase):
+    """Base class for the database models."""
+
+
+# Initial data for the project_estimates table
+SEED_ESTIMATES = (
+    {"project_type": "e-commerce website", "budget_range": "$3k-$6k", "typical_timeline": "2-3 months"},
+    {"project_type": "mobile restaurant app", "budget_range": "$5k-$8k", "typical_timeline": "3-4 months"},
+    {"project_type": "CRM system", "budget_range": "$4k-$7k", "typical_timeline": "4-6 months"},
+    {"project_type": "chatbot integration", "budget_range": "$2k-$4k", "typical_timeline": "2-3 months"},
+    {"project_type": "custom logistics", "budget_range": "$10k-$20k", "typical_timeline": "5-6 months"},
+)
+
+# In-memory copy of the project_estimates table, keyed by normalized project type.
+# The table is small and only changes through add_project_estimate, which updates the
+# copy in its own process; other worker processes pick the change up once the copy expires.
+# The copy is never changed in place: writers build a new dict and swap it in under
+# _estimates_lock, so lookups in other threads can read it without locking.
+ESTIMATE_CACHE_TTL = float(os.getenv('ESTIMATE_CACHE_TTL', '300'))
+_estimates = None
+_estimates_loaded_at = 0.0
+_estimates_lock = threading.Lock()
+
+
+def _normalize_project_type(project_type):
+    """Normalize a project type for use as an estimate cache key."""
+    return project_type.strip().lower()
+
+
+@contextmanager
+def session_scope():
+    """
+    Provide a session for a unit of work.
+    
+    The session is rolled back if an exception is raised and is always closed afterwards.
+    
+    Yields:
+        Session: The database session
+    """
+    session = Session()
+    try:
+        yield session
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
 
 
 class ProjectEstimate(Base):
@@ -45,12 +107,12 @@ class ProjectEstimate(Base):
     """
     __tablename__ = 'project_estimates'
 
-    id = Column(Integer, primary_key=True)
-    project_type = Column(String(255), nullable=False)
-    budget_range = Column(String(255), nullable=False)
-    typical_timeline = Column(String(255), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    project_type: Mapped[str] = mapped_column(String(255), index=True)
+    budget_range: Mapped[str] = mapped_column(String(255))
+    typical_timeline: Mapped[str] = mapped_column(String(255))
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def __repr__(self):
         return f"<ProjectEstimate(id={self.id}, project_type='{self.project_type}')>"
@@ -74,21 +136,28 @@ class Lead(Base):
     """
     __tablename__ = 'leads'
 
-    id = Column(Integer, primary_key=True)
-    name = Column(String(255), nullable=False)
-    contact = Column(String(255), nullable=False)
-    project_type = Column(String(255), nullable=False)
-    project_details = Column(Text)
-    estimated_budget = Column(String(255))
-    estimated_timeline = Column(String(255))
-    follow_up_consent = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String(255))
+    contact: Mapped[str] = mapped_column(String(255))
+    project_type: Mapped[str] = mapped_column(String(255), index=True)
+    project_details: Mapped[Optional[str]] = mapped_column(Text)
+    estimated_budget: Mapped[Optional[str]] = mapped_column(String(255))
+    estimated_timeline: Mapped[Optional[str]] = mapped_column(String(255))
+    follow_up_consent: Mapped[Optional[bool]] = mapped_column(Boolean, default=False)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def __repr__(self):
         return f"<Lead(id={self.id}, name='{self.name}', project_type='{self.project_type}')>"
 
 
+# Only the columns the estimate cache needs, selected as plain rows rather than ORM objects
+_ESTIMATES_STATEMENT = (
+    select(ProjectEstimate.project_type, ProjectEstimate.budget_range, ProjectEstimate.typical_timeline)
+    .order_by(ProjectEstimate.id)
+)
+
+
 def initialize_database():
     """
     Initialize the database with tables and initial data.
@@ -104,46 +173,27 @@ def initialize_database():
         Base.metadata.create_all(engine)
         logger.info("Tables created successfully.")
         
+        # create_all only adds indexes for new tables, so add any missing ones to existing databases
+        with engine.begin() as connection:
+            inspector = inspect(connection)
+            for table in (ProjectEstimate.__table__, Lead.__table__):
+                if inspector.has_table(table.name):
+                    for index in table.indexes:
+                        index.create(connection, checkfirst=True)
+        
         # Check if project_estimates table is empty
-        session = Session()
-        if session.query(ProjectEstimate).count() == 0:
-            logger.info("Populating project_estimates table with initial data...")
-            
-            # Initial data
-            initial_data = [
-                ProjectEstimate(
-                    project_type="e-commerce website",
-                    budget_range="$3k-$6k",
-                    typical_timeline="2-3 months"
-                ),
-                ProjectEstimate(
-                    project_type="mobile restaurant app",
-                    budget_range="$5k-$8k",
-                    typical_timeline="3-4 months"
-                ),
-                ProjectEstimate(
-                    project_type="CRM system",
-                    budget_range="$4k-$7k",
-                    typical_timeline="4-6 months"
-                ),
-                ProjectEstimate(
-                    project_type="chatbot integration",
-                    budget_range="$2k-$4k",
-                    typical_timeline="2-3 months"
-                ),
-                ProjectEstimate(
-                    project_type="custom logistics",
-                    budget_range="$10k-$20k",
-                    typical_timeline="5-6 months"
-                )
-            ]
+        with session_scope() as session:
+            if session.query(ProjectEstimate).count() == 0:
+                logger.info("Populating project_estimates table with initial data...")
+                
+                # Insert the seed rows in one batch, without per-object ORM state tracking
+                session.bulk_insert_mappings(ProjectEstimate, [dict(row) for row in SEED_ESTIMATES])
+                session.commit()
+                logger.info("Initial data added successfully.")
             
-            # Add initial data to the session
-            session.add_all(initial_data)
-            session.commit()
-            logger.info("Initial data added successfully.")
+            # Serve estimate lookups from memory from now on
+            load_estimates(session)
         
-        session.close()
         return True
     except Exception as e:
         logger.error(f"Error initializing database: {e}")
@@ -152,26 +202,67 @@ def initialize_database():
 
 def get_all_project_types():
     """
-    Get all project types from the database.
+    Get all project types.
+    
+    The project types are read from the in-memory estimate cache, which is loaded
+    on first use if initialize_database hasn't loaded it already, and reloaded
+    once it is older than ESTIMATE_CACHE_TTL seconds.
     
     Returns:
         list: List of project types
     """
     logger.info("Getting all project types...")
     try:
-        session = Session()
-        project_types = [pe.project_type for pe in session.query(ProjectEstimate).all()]
-        session.close()
-        return project_types
+        estimates = _get_estimates()
+        return [estimate["project_type"] for estimate in estimates.values()]
     except Exception as e:
         logger.error(f"Error getting project types: {e}")
         return []
 
 
+def load_estimates(session=None):
+    """
+    Load all project estimates into the in-memory estimate cache.
+    
+    Args:
+        session (Session, optional): An open session to use; a new one is opened if not given
+        
+    Returns:
+        dict: The estimates keyed by normalized project type, in insertion order
+    """
+    global _estimates, _estimates_loaded_at
+    if session is None:
+        with session_scope() as session:
+            return load_estimates(session)
+    
+    estimates = {}
+    for row in session.execute(_ESTIMATES_STATEMENT).mappings():
+        # Keep the first row for duplicate project types, like the former ILIKE ... LIMIT 1 query
+        estimates.setdefault(_normalize_project_type(row["project_type"]), dict(row))
+    
+    with _estimates_lock:
+        _estimates = estimates
+        _estimates_loaded_at = time.monotonic()
+    logger.info(f"Loaded {len(estimates)} project estimates into memory")
+    return estimates
+
+
+def _get_estimates():
+    """Return the in-memory estimate cache, (re)loading it if it is missing or has expired."""
+    if _estimates is None or time.monotonic() - _estimates_loaded_at > ESTIMATE_CACHE_TTL:
+        return load_estimates()
+    return _estimates
+
+
 def get_estimate_by_project_type(project_type):
     """
     Get budget and timeline estimates for a project type.
     
+    The lookup is served from the in-memory estimate cache, which is loaded on first use
+    if initialize_database hasn't loaded it already, and reloaded once it is older than
+    ESTIMATE_CACHE_TTL seconds. An exact case-insensitive match is
+    tried first, then the first project type containing the given one.
+    
     Args:
         project_type (str): The type of project
         
@@ -181,22 +272,15 @@ def get_estimate_by_project_type(project_type):
     """
     logger.info(f"Getting estimate for project type: {project_type}")
     try:
-        session = Session()
-        project_estimate = session.query(ProjectEstimate).filter(
-            ProjectEstimate.project_type.ilike(f"%{project_type}%")
-        ).first()
+        estimates = _get_estimates()
         
-        if project_estimate:
-            result = {
-                "project_type": project_estimate.project_type,
-                "budget_range": project_estimate.budget_range,
-                "typical_timeline": project_estimate.typical_timeline
-            }
-        else:
-            result = None
-            
-        session.close()
-        return result
+        query = _normalize_project_type(project_type)
+        estimate = estimates.get(query)
+        if estimate is None:
+            estimate = next((value for key, value in estimates.items() if query in key), None)
+        
+        # Return a copy so callers can't modify the cached entry
+        return dict(estimate) if estimate is not None else None
     except Exception as e:
         logger.error(f"Error getting estimate: {e}")
         return None
@@ -220,27 +304,25 @@ def store_lead(name, contact, project_type, project_details=None, estimated_budg
     """
     logger.info(f"Storing lead: {name}, {contact}, {project_type}")
     try:
-        session = Session()
-        
-        # Create new lead
-        lead = Lead(
-            name=name,
-            contact=contact,
-            project_type=project_type,
-            project_details=project_details,
-            estimated_budget=estimated_budget,
-            estimated_timeline=estimated_timeline,
-            follow_up_consent=follow_up_consent
-        )
-        
-        # Add lead to the session
-        session.add(lead)
-        session.commit()
-        
-        # Get the ID of the newly created lead
-        lead_id = lead.id
+        with session_scope() as session:
+            # Create new lead
+            lead = Lead(
+                name=name,
+                contact=contact,
+                project_type=project_type,
+                project_details=project_details,
+                estimated_budget=estimated_budget,
+                estimated_timeline=estimated_timeline,
+                follow_up_consent=follow_up_consent
+            )
+            
+            # Add lead to the session
+            session.add(lead)
+            session.commit()
+            
+            # Get the ID of the newly created lead
+            lead_id = lead.id
         
-        session.close()
         logger.info(f"Lead stored successfully with ID: {lead_id}")
         return lead_id
     except Exception as e:
@@ -248,41 +330,57 @@ def store_lead(name, contact, project_type, project_details=None, estimated_budg
         return None
 
 
-def get_all_leads():
+def get_all_leads(limit=None, offset=0):
     """
-    Get all leads from the database.
+    Get leads from the database, oldest first.
+    
+    Args:
+        limit (int, optional): The maximum number of leads to return; all leads if not given
+        offset (int, optional): The number of leads to skip
     
     Returns:
-        list: List of leads as dictionaries, or None if an error occurred
+        list: List of leads as dictionaries, or None if an error occurred.
+              Timestamps are left as datetime objects for the JSON encoder to format.
     """
-    logger.info("Getting all leads...")
+    logger.info(f"Getting leads (limit={limit}, offset={offset})...")
     try:
-        session = Session()
-        leads = session.query(Lead).all()
-        
-        # Convert leads to dictionaries
-        result = []
-        for lead in leads:
-            result.append({
-                'id': lead.id,
-                'name': lead.name,
-                'contact': lead.contact,
-                'project_type': lead.project_type,
-                'project_details': lead.project_details,
-                'estimated_budget': lead.estimated_budget,
-                'estimated_timeline': lead.estimated_timeline,
-                'follow_up_consent': lead.follow_up_consent,
-                'created_at': lead.created_at.isoformat(),
-                'updated_at': lead.updated_at.isoformat()
-            })
-            
-        session.close()
-        return result
+        with session_scope() as session:
+            statement = select(Lead).order_by(Lead.id).offset(offset).limit(limit)
+            # Convert leads to dictionaries
+            return [
+                {
+                    'id': lead.id,
+                    'name': lead.name,
+                    'contact': lead.contact,
+                    'project_type': lead.project_type,
+                    'project_details': lead.project_details,
+                    'estimated_budget': lead.estimated_budget,
+                    'estimated_timeline': lead.estimated_timeline,
+                    'follow_up_consent': lead.follow_up_consent,
+                    'created_at': lead.created_at,
+                    'updated_at': lead.updated_at
+                }
+                for lead in session.execute(statement).scalars()
+            ]
     except Exception as e:
         logger.error(f"Error getting leads: {e}")
         return None
 
 
+def _cache_estimate(project_type, budget_range, typical_timeline):
+    """Add a new estimate to the in-memory estimate cache, if it is loaded, by swapping in a copy."""
+    global _estimates
+    key = _normalize_project_type(project_type)
+    with _estimates_lock:
+        if _estimates is None or key in _estimates:
+            return
+        _estimates = {**_estimates, key: {
+            "project_type": project_type,
+            "budget_range": budget_range,
+            "typical_timeline": typical_timeline
+        }}
+
+
 def add_project_estimate(project_type, budget_range, typical_timeline):
     """
     Add a new project estimate to the database.
@@ -297,23 +395,24 @@ def add_project_estimate(project_type, budget_range, typical_timeline):
     """
     logger.info(f"Adding project estimate: {project_type}, {budget_range}, {typical_timeline}")
     try:
-        session = Session()
-        
-        # Create new project estimate
-        project_estimate = ProjectEstimate(
-            project_type=project_type,
-            budget_range=budget_range,
-            typical_timeline=typical_timeline
-        )
-        
-        # Add project estimate to the session
-        session.add(project_estimate)
-        session.commit()
+        with session_scope() as session:
+            # Create new project estimate
+            project_estimate = ProjectEstimate(
+                project_type=project_type,
+                budget_range=budget_range,
+                typical_timeline=typical_timeline
+            )
+            
+            # Add project estimate to the session
+            session.add(project_estimate)
+            session.commit()
+            
+            # Get the ID of the newly created project estimate
+            project_estimate_id = project_estimate.id
         
-        # Get the ID of the newly created project estimate
-        project_estimate_id = project_estimate.id
+        # Keep the in-memory estimate cache in step with the table
+        _cache_estimate(project_type, budget_range, typical_timeline)
         
-        session.close()
         logger.info(f"Project estimate added successfully with ID: {project_estimate_id}")
         return project_estimate_id
     except Exception as e:
@@ -323,4 +422,6 @@ def add_project_estimate(project_type, budget_range, typical_timeline):
 
 # Initialize the database when the module is imported
 if __name__ == "__main__":
+    from .logging_config import configure_logging
+    configure_logging()
     initialize_database() 
\ No newline at end of file
@@ -0,0 +1,45 @@
+"""
+Logging configuration for the pre-sales chatbot.
+
+This module provides a single logging setup shared by the backend modules and the run scripts.
+"""
+
+import atexit
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = '[%(asctime)s] [%(levelname)s] [%(name)s] - %(message)s'
+LOG_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# The listener that writes queued records, once logging is configured
+_listener = None
+
+
+def configure_logging():
+    """
+    Configure the root logger to log through a queue.
+
+    Log calls only put the record on a queue; formatting and writing to stderr
+    (or to LOG_FILE, if set) happen in a background thread, so logging doesn't
+    block the event loop. The level is read from LOG_LEVEL (default INFO).
+    Calling this more than once has no further effect.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_file = os.getenv('LOG_FILE')
+    handler = logging.FileHandler(log_file) if log_file else logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT))
+
+    log_queue = queue.Queue(-1)
+    root = logging.getLogger()
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(os.getenv('LOG_LEVEL', 'INFO'))
+
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    # Flush any queued records on exit
+    atexit.register(_listener.stop)
@@ -5,16 +5,17 @@ This module initializes the FastAPI application and sets up the API endpoints.
 """
 
 import logging
-import uvicorn
+import anyio
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
 import time
 from contextlib import asynccontextmanager
 
-from .config import API_HOST, API_PORT, DEBUG
-from .database import initialize_database
-from .api import router
+from .config import API_HOST, API_PORT, API_WORKERS, DEBUG, THREADPOOL_SIZE, log_settings
+from .database import engine, initialize_database
+from .logging_config import configure_logging
+from .api import OrjsonResponse, router
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -26,9 +27,14 @@ async def lifespan(app: FastAPI):
     
     This handles startup and shutdown events.
     """
-    # Startup
+    # Startup; uvicorn's worker processes import this module directly, so they set up logging here
+    configure_logging()
+    log_settings()
     logger.info("Starting up the application...")
     
+    # Blocking database calls run in AnyIO's worker threads, which are capped at 40 by default
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    
     # Initialize the database
     if initialize_database():
         logger.info("Database initialized successfully.")
@@ -39,26 +45,15 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down the application...")
+    
+    # Close the pooled database connections
+    engine.dispose()
+
+
+# Paths that the request logging middleware skips
+_SKIP_PATHS = {"/api/health", "/"}
+
 
-# Create FastAPI application
-app = FastAPI(
-    title="Pre-Sales Chatbot API",
-    description="API for the pre-sales chatbot",
-    version="1.0.0",
-    lifespan=lifespan,
-)
-
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Allow all origins for development
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Add request logging middleware
-@app.middleware("http")
 async def log_requests(request: Request, call_next):
     """
     Middleware to log all requests.
@@ -70,35 +65,36 @@ async def log_requests(request: Request, call_next):
     Returns:
         Response: The response from the next middleware or route handler
     """
-    start_time = time.time()
+    # Frequently polled paths are not logged at all
+    if request.url.path in _SKIP_PATHS:
+        return await call_next(request)
+    
+    start = time.perf_counter_ns()
     
     # Log request details
-    logger.info(f"Request: {request.method} {request.url.path}")
+    logger.info("Request: %s %s", request.method, request.url.path)
     
     # Process the request
     try:
         response = await call_next(request)
         
         # Log response details
-        process_time = time.time() - start_time
-        logger.info(f"Response: {response.status_code} (took {process_time:.4f}s)")
+        elapsed_us = (time.perf_counter_ns() - start) // 1000
+        logger.info("Response: %s (took %sus)", response.status_code, elapsed_us)
         
         return response
     except Exception as e:
         # Log error details
-        process_time = time.time() - start_time
-        logger.error(f"Error: {str(e)} (took {process_time:.4f}s)")
+        elapsed_us = (time.perf_counter_ns() - start) // 1000
+        logger.error("Error: %s (took %sus)", e, elapsed_us)
         
         # Return error response
-        return JSONResponse(
+        return OrjsonResponse(
             status_code=500,
             content={"detail": "Internal server error"}
         )
 
-# Include API router
-app.include_router(router, prefix="/api")
 
-@app.get("/")
 async def root():
     """
     Root endpoint.
@@ -108,12 +104,64 @@ async def root():
     """
     return {"message": "Welcome to the Pre-Sales Chatbot API"}
 
+
+def create_app(lifespan=lifespan) -> FastAPI:
+    """
+    Create the FastAPI application.
+    
+    Args:
+        lifespan (callable, optional): The lifespan context manager; tests can pass one
+            that skips database initialization
+        
+    Returns:
+        FastAPI: The configured application
+    """
+    app = FastAPI(
+        title="Pre-Sales Chatbot API",
+        description="API for the pre-sales chatbot",
+        version="1.0.0",
+        lifespan=lifespan,
+        default_response_class=OrjsonResponse,
+    )
+    
+    # Add CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # Allow all origins for development
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    
+    # Compress larger responses such as lead listings
+    app.add_middleware(GZipMiddleware, minimum_size=500)
+    
+    # Add request logging middleware
+    app.middleware("http")(log_requests)
+    
+    # Include API router
+    app.include_router(router, prefix="/api")
+    app.add_api_route("/", root, methods=["GET"])
+    
+    return app
+
+
+# Application used by uvicorn
+app = create_app()
+
 # Run the application
 if __name__ == "__main__":
-    logger.info(f"Starting server on {API_HOST}:{API_PORT} (debug={DEBUG})")
+    import uvicorn
+    
+    configure_logging()
+    
+    # Reload only works with a single worker, so use multiple workers outside debug mode
+    workers = 1 if DEBUG else API_WORKERS
+    logger.info(f"Starting server on {API_HOST}:{API_PORT} (debug={DEBUG}, workers={workers})")
     uvicorn.run(
         "src.backend.main:app",
         host=API_HOST,
         port=API_PORT,
-        reload=DEBUG
+        reload=DEBUG,
+        workers=workers
     ) 
\ No newline at end of file
@@ -5,28 +5,30 @@ This module implements the Budget & Timeline Tool, which provides budget and tim
 for various project types using LiteLLM for project type extraction.
 """
 
+import asyncio
+import functools
 import logging
 import os
 import json
+import re
+import threading
+from collections import OrderedDict
+import orjson
 from dotenv import load_dotenv
-from litellm import completion
+from fastapi.concurrency import run_in_threadpool
+from litellm import acompletion, completion, get_llm_provider, supports_response_schema
 from .database import get_all_project_types, get_estimate_by_project_type, store_lead
-from typing import Dict, Any, Optional, List, Union, ClassVar
+from typing import Dict, Any, Optional, List, Set, Tuple, Union, ClassVar
 from pydantic import BaseModel, Field
 
 # LangChain imports for tool compatibility
 from langchain.tools import BaseTool
-from langchain.callbacks.manager import CallbackManagerForToolRun
+from langchain.callbacks.manager import AsyncCallbackManagerForToolRun, CallbackManagerForToolRun
 
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='[%(asctime)s] [%(levelname)s] [%(name)s] - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+# Logging is configured by the application entry points
 logger = logging.getLogger(__name__)
 
 # LiteLLM configuration
@@ -34,10 +36,73 @@ LITELLM_API_KEY = os.getenv('LITELLM_API_KEY', '')
 LITELLM_MODEL = os.getenv('LITELLM_MODEL', 'gpt-4o-mini')
 
 
+def _uses_prompt_cache_markers(model):
+    """Whether the model's provider only caches prompt prefixes marked with cache_control."""
+    try:
+        return get_llm_provider(model)[1] == "anthropic"
+    except Exception:
+        return False
+
+
+# OpenAI caches long prompt prefixes automatically; Anthropic needs an explicit marker
+PROMPT_CACHE_MARKERS = _uses_prompt_cache_markers(LITELLM_MODEL)
+
+
+def _uses_structured_output(model):
+    """Whether the model can be constrained to a JSON schema via response_format."""
+    try:
+        return supports_response_schema(model=model)
+    except Exception:
+        return False
+
+
+# Constrain classifier answers to the known project types when the model supports it;
+# otherwise the free-form answer is matched against them
+STRUCTURED_OUTPUT = _uses_structured_output(LITELLM_MODEL)
+
+
+# Concurrent async classifications are sent to LiteLLM in batches of up to this many,
+# waiting at most this long (in seconds) for a batch to fill; a window of 0 disables batching
+CLASSIFICATION_BATCH_SIZE = int(os.getenv('CLASSIFICATION_BATCH_SIZE', '8'))
+CLASSIFICATION_BATCH_WINDOW = float(os.getenv('CLASSIFICATION_BATCH_WINDOW', '0.05'))
+
+# A description that is only part of a project type name ("crm") is matched locally only if the part is
+# at least this long, names a single project type, and isn't just generic words that say little on their own
+MIN_NAME_PART_LENGTH = 3
+GENERIC_NAME_WORDS = frozenset({
+    "app", "apps", "application", "custom", "integration", "mobile", "platform",
+    "site", "software", "system", "tool", "web", "website"
+})
+
+# Project type classifications, keyed by normalized description and the known project types.
+# Sync callers run in worker threads, so every access holds _classification_cache_lock.
+CLASSIFICATION_CACHE_SIZE = 1024
+_classification_cache: "OrderedDict[Tuple[str, Tuple[str, ...]], Optional[str]]" = OrderedDict()
+_classification_cache_lock = threading.Lock()
+_MISSING = object()
+
+# Fallback responses for get_estimate; callers get a copy
+UNKNOWN_ESTIMATE = {
+    "project_type": "unknown",
+    "budget_range": "Requires more information",
+    "typical_timeline": "Requires more information",
+    "message": "We need more details about your project to provide an accurate estimate."
+}
+ERROR_ESTIMATE = {
+    "project_type": "error",
+    "budget_range": "Unavailable",
+    "typical_timeline": "Unavailable",
+    "message": "An error occurred while retrieving the estimate. Please try again later."
+}
+
+
 def extract_project_type(user_input):
     """
     Extract the project type from user input using LiteLLM.
     
+    Results are cached per normalized input (lowercased, whitespace collapsed), so repeated
+    descriptions don't trigger another LLM call.
+    
     Args:
         user_input (str): The user's description of their project
         
@@ -51,61 +116,522 @@ def extract_project_type(user_input):
     logger.info(f"Extracting project type from: {user_input}")
     
     try:
-        # Get all project types from the database
-        project_types = get_all_project_types()
+        key = _classification_key(user_input, get_all_project_types())
+        if key is None:
+            return None
+        
+        cached = _cached_classification(key)
+        if cached is not _MISSING:
+            return cached
+        
+        # Skip the LLM when the description matches a project type by name
+        named_type = _named_project_type(*key)
+        if named_type:
+            return _store_classification(key, named_type)
+        
+        # Call LiteLLM
+        response = completion(**_classification_request(*key))
+        content = response.choices[0].message.content
+        return _store_classification(key, _parse_classification(content, key[1]))
+    
+    except Exception as e:
+        logger.error(f"Error extracting project type: {e}")
+        return None
+
+
+async def aextract_project_type(user_input):
+    """
+    Extract the project type from user input using LiteLLM, without blocking the event loop.
+    
+    Shares its cache with extract_project_type. Concurrent calls are classified together
+    in a single LiteLLM request (see _ClassificationBatcher).
+    
+    Args:
+        user_input (str): The user's description of their project
         
-        if not project_types:
-            logger.warning("No project types found in the database")
+    Returns:
+        str: The extracted project type that matches one in our database, or None if no match is found
+    """
+    logger.info(f"Extracting project type from: {user_input}")
+    
+    try:
+        project_types = await run_in_threadpool(get_all_project_types)
+        key = _classification_key(user_input, project_types)
+        if key is None:
             return None
         
-        # Create a prompt for the LLM
-        prompt = f"""
-        You are a project type classifier for a software development company.
+        cached = _cached_classification(key)
+        if cached is not _MISSING:
+            return cached
         
-        Given a user's description of their project, classify it into one of the following project types:
-        {', '.join(project_types)}
+        # Skip the LLM when the description matches a project type by name
+        named_type = _named_project_type(*key)
+        if named_type:
+            return _store_classification(key, named_type)
         
-        If the user's description doesn't match any of these project types, respond with "unknown".
+        # Call LiteLLM, batched with any other classifications requested at the same time
+        return _store_classification(key, await _classification_batcher.classify(key))
+    
+    except Exception as e:
+        logger.error(f"Error extracting project type: {e}")
+        return None
+
+
+def _classification_key(user_input, project_types):
+    """
+    Build the classification cache key for a description.
+    
+    Args:
+        user_input (str): The user's description of their project
+        project_types (list): The known project types
         
-        User's project description: "{user_input}"
+    Returns:
+        tuple: The normalized description and project types, or None if there are no project types
+    """
+    if not project_types:
+        logger.warning("No project types found in the database")
+        return None
+    
+    return " ".join(user_input.lower().split()), tuple(project_types)
+
+
+@functools.lru_cache(maxsize=8)
+def _project_type_lookup(project_types):
+    """
+    Build the lookup tables for matching descriptions against project types locally.
+    
+    Args:
+        project_types (tuple): The known project types
         
-        Project type (respond with only the project type, no other text):
-        """
+    Returns:
+        tuple: A dict from lowercased name to project type (first one wins); a pattern
+               matching any of the names as whole words, longest first so the most
+               specific project type wins; and a dict from each distinctive run of
+               words in a name to its project type
+    """
+    names = {}
+    for pt in project_types:
+        names.setdefault(pt.lower(), pt)
+    
+    alternatives = sorted(names, key=len, reverse=True)
+    pattern = re.compile(r"\b(?:" + "|".join(re.escape(name) for name in alternatives) + r")\b")
+    
+    # Index every run of consecutive words of each name, then drop the ambiguous and uninformative ones
+    part_types = {}
+    for name, pt in names.items():
+        words = name.split()
+        for start in range(len(words)):
+            for end in range(start + 1, len(words) + 1):
+                part_types.setdefault(" ".join(words[start:end]), set()).add(pt)
+    
+    parts = {
+        part: next(iter(matches))
+        for part, matches in part_types.items()
+        if len(matches) == 1
+        and len(part) >= MIN_NAME_PART_LENGTH
+        and not GENERIC_NAME_WORDS.issuperset(part.split())
+    }
+    return names, pattern, parts
+
+
+def _named_project_type(user_input, project_types):
+    """
+    Match a normalized description to a project type without the LLM.
+    
+    The description matches if it is a project type, names one as whole words
+    ("we need a crm system"), or is a distinctive run of words from one ("crm").
+    
+    Args:
+        user_input (str): The normalized project description
+        project_types (tuple): The known project types
         
-        # Call LiteLLM
-        response = completion(
-            model=LITELLM_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.1,  # Low temperature for more deterministic results
-            max_tokens=50
-        )
+    Returns:
+        str: The matching project type, or None
+    """
+    if not user_input:
+        return None
+    
+    names, pattern, parts = _project_type_lookup(project_types)
+    named_type = names.get(user_input)
+    
+    if named_type is None:
+        match = pattern.search(user_input)
+        if match is not None:
+            named_type = names[match.group(0)]
+    
+    if named_type is None:
+        named_type = parts.get(user_input)
+    
+    if named_type is not None:
+        logger.info(f"Matched project type locally: {named_type}")
+    return named_type
+
+
+def _cached_classification(key):
+    """Return the cached classification for a key, or _MISSING."""
+    with _classification_cache_lock:
+        result = _classification_cache.get(key, _MISSING)
+        if result is not _MISSING:
+            _classification_cache.move_to_end(key)
+    if result is not _MISSING:
+        logger.info(f"Using cached project type: {result}")
+    return result
+
+
+def _store_classification(key, result):
+    """Cache a classification, dropping the least recently used one when full, and return it."""
+    with _classification_cache_lock:
+        _classification_cache[key] = result
+        if len(_classification_cache) > CLASSIFICATION_CACHE_SIZE:
+            _classification_cache.popitem(last=False)
+    return result
+
+
+def _classification_messages(instructions, user_content):
+    """
+    Build the chat messages for a classification request.
+    
+    The instructions only depend on the project types, so they go first in their own
+    system message. That keeps the prompt prefix identical across requests for providers
+    that cache prompt prefixes; Anthropic models also need the prefix marked explicitly.
+    
+    Args:
+        instructions (str): The static classifier instructions
+        user_content (str): The description(s) to classify
+        
+    Returns:
+        list: The messages for completion/acompletion
+    """
+    system_content = [{"type": "text", "text": instructions}]
+    if PROMPT_CACHE_MARKERS:
+        system_content[0]["cache_control"] = {"type": "ephemeral"}
+    
+    return [
+        {"role": "system", "content": system_content},
+        {"role": "user", "content": user_content}
+    ]
+
+
+@functools.lru_cache(maxsize=8)
+def _classification_instructions(project_types):
+    """
+    Build the classifier instructions for a set of project types.
+    
+    The instructions only change when the project types do, so they are built once per set.
+    
+    Args:
+        project_types (tuple): The known project types
         
-        # Extract the project type from the response
-        extracted_type = response.choices[0].message.content.strip().lower()
-        logger.info(f"Extracted project type: {extracted_type}")
+    Returns:
+        str: The system prompt for single-description classification
+    """
+    return f"""
+    You are a project type classifier for a software development company.
+    
+    Given a user's description of their project, classify it into one of the following project types:
+    {', '.join(project_types)}
+    
+    If the user's description doesn't match any of these project types, respond with "unknown".
+    
+    Respond with only the project type, no other text.
+    """
+
+
+@functools.lru_cache(maxsize=8)
+def _batch_classification_instructions(project_types):
+    """
+    Build the batch classifier instructions for a set of project types.
+    
+    Args:
+        project_types (tuple): The known project types
         
-        # Match the extracted type to one of our project types
-        for pt in project_types:
-            if pt.lower() == extracted_type:
-                return pt
+    Returns:
+        str: The system prompt for classifying numbered descriptions
+    """
+    return f"""
+    You are a project type classifier for a software development company.
+    
+    Given numbered descriptions of users' projects, classify each one into one of the following project types:
+    {', '.join(project_types)}
+    
+    If a description doesn't match any of these project types, classify it as "unknown".
+    
+    Respond with one line per description in the form "<number>: <project type>", with no other text.
+    """
+
+
+def _classification_request(user_input, project_types):
+    """
+    Build the LiteLLM completion arguments for classifying a description.
+    
+    Args:
+        user_input (str): The normalized project description
+        project_types (tuple): The known project types
+        
+    Returns:
+        dict: Keyword arguments for completion/acompletion
+    """
+    request = {
+        "model": LITELLM_MODEL,
+        "messages": _classification_messages(
+            _classification_instructions(project_types),
+            f"User's project description: \"{user_input}\""
+        ),
+        "temperature": 0.1,  # Low temperature for more deterministic results
+        "max_tokens": 50
+    }
+    if STRUCTURED_OUTPUT:
+        schema = {
+            "type": "object",
+            "properties": {"project_type": {"enum": [*project_types, "unknown"]}},
+            "required": ["project_type"],
+            "additionalProperties": False
+        }
+        request["response_format"] = {
+            "type": "json_schema",
+            "json_schema": {"name": "project_type", "schema": schema, "strict": True}
+        }
+        request["max_tokens"] = 30
+    return request
+
+
+def _batch_classification_request(user_inputs, project_types):
+    """
+    Build the LiteLLM completion arguments for classifying several descriptions at once.
+    
+    Args:
+        user_inputs (list): The normalized project descriptions
+        project_types (tuple): The known project types
+        
+    Returns:
+        dict: Keyword arguments for acompletion
+    """
+    descriptions = "\n".join(f'{number}: "{user_input}"' for number, user_input in enumerate(user_inputs, 1))
+    
+    request = {
+        "model": LITELLM_MODEL,
+        "messages": _classification_messages(
+            _batch_classification_instructions(project_types),
+            f"Project descriptions:\n{descriptions}"
+        ),
+        "temperature": 0.1,  # Low temperature for more deterministic results
+        "max_tokens": 50 * len(user_inputs)
+    }
+    if STRUCTURED_OUTPUT:
+        # One answer per description, in order
+        schema = {
+            "type": "object",
+            "properties": {
+                "project_types": {
+                    "type": "array",
+                    "items": {"enum": [*project_types, "unknown"]},
+                    "minItems": len(user_inputs),
+                    "maxItems": len(user_inputs)
+                }
+            },
+            "required": ["project_types"],
+            "additionalProperties": False
+        }
+        request["response_format"] = {
+            "type": "json_schema",
+            "json_schema": {"name": "project_types", "schema": schema, "strict": True}
+        }
+        request["max_tokens"] = 10 + 20 * len(user_inputs)
+    return request
+
+
+BATCH_LINE_PATTERN = re.compile(r"^\s*(\d+)\s*[:.)]\s*(.+?)\s*$", re.MULTILINE)
+
+
+class _ClassificationBatcher:
+    """
+    Collects classification requests for a short window and sends them to LiteLLM together.
+    
+    A batch is sent once CLASSIFICATION_BATCH_SIZE requests are waiting or
+    CLASSIFICATION_BATCH_WINDOW seconds after the first one arrived. A batch of one
+    uses the regular single-description prompt.
+    """
+    
+    def __init__(self):
+        self._loop = None
+        self._pending: "OrderedDict[Tuple[str, Tuple[str, ...]], asyncio.Future]" = OrderedDict()
+        self._flush_handle = None
+        # Strong references to running sends, so they aren't garbage collected mid-request
+        self._tasks: "Set[asyncio.Task]" = set()
+    
+    async def classify(self, key):
+        """
+        Classify a description, waiting for the batch it ends up in.
+        
+        Args:
+            key (tuple): The classification cache key (normalized description, project types)
             
-        # If the extracted type is "unknown" or doesn't match any of our project types
-        if extracted_type == "unknown":
-            logger.info("Project type classified as unknown")
-            return None
+        Returns:
+            str: The matching project type, or None if no match is found
+        """
+        loop = asyncio.get_running_loop()
+        if CLASSIFICATION_BATCH_WINDOW <= 0:
+            content = (await acompletion(**_classification_request(*key))).choices[0].message.content
+            return _parse_classification(content, key[1])
+        
+        if self._loop is not loop:
+            # Requests left over from a previous event loop can never complete
+            self._loop = loop
+            self._pending = OrderedDict()
+            self._flush_handle = None
         
-        # Try to find a partial match
-        for pt in project_types:
-            if extracted_type in pt.lower() or pt.lower() in extracted_type:
-                logger.info(f"Found partial match: {pt}")
-                return pt
+        # Identical requests in the same window share one result
+        future = self._pending.get(key)
+        if future is None:
+            future = loop.create_future()
+            self._pending[key] = future
+            if len(self._pending) >= CLASSIFICATION_BATCH_SIZE:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(CLASSIFICATION_BATCH_WINDOW, self._flush)
+        
+        # Shield the shared future so one cancelled caller doesn't cancel the others
+        return await asyncio.shield(future)
+    
+    def _flush(self):
+        """Send all pending requests, one LiteLLM call per set of project types."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
         
-        logger.info("No matching project type found")
+        batches: Dict[Tuple[str, ...], List[Tuple[Tuple[str, Tuple[str, ...]], asyncio.Future]]] = {}
+        for key, future in self._pending.items():
+            batches.setdefault(key[1], []).append((key, future))
+        self._pending = OrderedDict()
+        
+        for project_types, batch in batches.items():
+            task = self._loop.create_task(self._send(project_types, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _send(self, project_types, batch):
+        """Classify one batch and resolve its futures."""
+        user_inputs = [key[0] for key, _ in batch]
+        try:
+            try:
+                if len(batch) == 1:
+                    response = await acompletion(**_classification_request(user_inputs[0], project_types))
+                    results = {1: _parse_classification(response.choices[0].message.content, project_types)}
+                else:
+                    logger.info(f"Classifying {len(batch)} project descriptions in one request")
+                    response = await acompletion(**_batch_classification_request(user_inputs, project_types))
+                    results = _parse_batch_classification(response.choices[0].message.content, project_types)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            
+            for number, (key, future) in enumerate(batch, 1):
+                if future.done():
+                    continue
+                if number in results:
+                    future.set_result(results[number])
+                else:
+                    # Raising keeps the missing answer out of the classification cache
+                    future.set_exception(ValueError(f"No classification returned for: {key[0]}"))
+        finally:
+            # A cancelled or failed send must not leave its callers waiting forever
+            for key, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError(f"Classification was not completed for: {key[0]}"))
+
+
+_classification_batcher = _ClassificationBatcher()
+
+
+def _structured_answer(content, field):
+    """Return a field of a JSON classification answer, or None if the answer isn't JSON."""
+    if not STRUCTURED_OUTPUT:
         return None
+    try:
+        return orjson.loads(content)[field]
+    except (orjson.JSONDecodeError, KeyError, TypeError):
+        # Some providers ignore response_format; fall back to the free-form answer
+        return None
+
+
+def _parse_classification(content, project_types):
+    """
+    Turn a LiteLLM classification answer into one of the known project types.
     
-    except Exception as e:
-        logger.error(f"Error extracting project type: {e}")
+    Args:
+        content (str): The LLM's answer
+        project_types (tuple): The known project types
+        
+    Returns:
+        str: The matching project type, or None if no match is found
+    """
+    answer = _structured_answer(content, "project_type")
+    if not isinstance(answer, str):
+        return _match_project_type(content, project_types)
+    
+    # The schema restricts the answer to the project types or "unknown"
+    logger.info(f"Extracted project type: {answer}")
+    return _project_type_lookup(project_types)[0].get(answer.lower())
+
+
+def _parse_batch_classification(content, project_types):
+    """
+    Turn a LiteLLM batch classification answer into the known project types.
+    
+    Args:
+        content (str): The LLM's answer
+        project_types (tuple): The known project types
+        
+    Returns:
+        dict: The matching project type (or None) by description number, starting at 1
+    """
+    answers = _structured_answer(content, "project_types")
+    if not isinstance(answers, list):
+        return {
+            int(number): _match_project_type(answer, project_types)
+            for number, answer in BATCH_LINE_PATTERN.findall(content)
+        }
+    
+    names = _project_type_lookup(project_types)[0]
+    return {number: names.get(str(answer).lower()) for number, answer in enumerate(answers, 1)}
+
+
+def _match_project_type(content, project_types):
+    """
+    Match a LiteLLM classification answer to one of the known project types.
+    
+    Args:
+        content (str): The project type named by the LLM
+        project_types (tuple): The known project types
+        
+    Returns:
+        str: The matching project type, or None if no match is found
+    """
+    # Extract the project type from the response
+    extracted_type = content.strip().strip('"').lower()
+    logger.info(f"Extracted project type: {extracted_type}")
+    
+    # Match the extracted type to one of our project types
+    names = _project_type_lookup(project_types)[0]
+    match = names.get(extracted_type)
+    if match is not None:
+        return match
+        
+    # If the extracted type is "unknown" or doesn't match any of our project types
+    if extracted_type == "unknown":
+        logger.info("Project type classified as unknown")
         return None
+    
+    # Try to find a partial match
+    for name, pt in names.items():
+        if extracted_type in name or name in extracted_type:
+            logger.info(f"Found partial match: {pt}")
+            return pt
+    
+    logger.info("No matching project type found")
+    return None
 
 
 def get_estimate(project_type):
@@ -148,23 +674,54 @@ def get_estimate(project_type):
         # If we still don't have an estimate, return a default response
         if not estimate:
             logger.warning(f"No match found for {project_type}")
-            return {
-                "project_type": "unknown",
-                "budget_range": "Requires more information",
-                "typical_timeline": "Requires more information",
-                "message": "We need more details about your project to provide an accurate estimate."
-            }
+            return dict(UNKNOWN_ESTIMATE)
         
         return estimate
     
     except Exception as e:
         logger.error(f"Error getting estimate: {e}")
-        return {
-            "project_type": "error",
-            "budget_range": "Unavailable",
-            "typical_timeline": "Unavailable",
-            "message": "An error occurred while retrieving the estimate. Please try again later."
-        }
+        return dict(ERROR_ESTIMATE)
+
+
+async def aget_estimate(project_type):
+    """
+    Get budget and timeline estimates for a project type, without blocking the event loop.
+    
+    Behaves like get_estimate; database lookups run in one of AnyIO's worker threads
+    (sized by THREADPOOL_SIZE in the API) and the LiteLLM call is awaited.
+    
+    Args:
+        project_type (str): The type of project or a description of the project
+        
+    Returns:
+        dict: A dictionary containing the project_type, budget_range, and typical_timeline,
+              or a default response if no match is found
+    """
+    logger.info(f"Getting estimate for project type: {project_type}")
+    
+    try:
+        # Try to get an exact match first
+        estimate = await run_in_threadpool(get_estimate_by_project_type, project_type)
+        
+        # If no exact match, try extracting the project type using LiteLLM
+        if not estimate:
+            logger.info(f"No exact match found for {project_type}, trying LiteLLM extraction")
+            extracted_project_type = await aextract_project_type(project_type)
+            
+            if extracted_project_type:
+                logger.info(f"Extracted {project_type} to {extracted_project_type}")
+                estimate = await run_in_threadpool(get_estimate_by_project_type, extracted_project_type)
+        
+        # If we still don't have an estimate, return a default response
+        if not estimate:
+            logger.warning(f"No match found for {project_type}")
+            return dict(UNKNOWN_ESTIMATE)
+        
+        return estimate
+    
+    except Exception as e:
+        logger.error(f"Error getting estimate: {e}")
+        return dict(ERROR_ESTIMATE)
 
 
 # LangChain Tool Implementations for LangFlow compatibility
@@ -182,8 +739,13 @@ class BudgetTimelineTool(BaseTool):
     
     def _run(self, project_type: str, run_manager: Optional[CallbackManagerForToolRun] = None) -> Dict[str, Any]:
         """Run the tool."""
-        logger.info(f"BudgetTimelineTool called with project_type: {project_type}")
+        logger.debug("BudgetTimelineTool called with project_type: %s", project_type)
         return get_estimate(project_type)
+    
+    async def _arun(self, project_type: str, run_manager: Optional[AsyncCallbackManagerForToolRun] = None) -> Dict[str, Any]:
+        """Run the tool asynchronously."""
+        logger.debug("BudgetTimelineTool called with project_type: %s", project_type)
+        return await aget_estimate(project_type)
 
 
 class StoreLeadInput(BaseModel):
@@ -215,7 +777,7 @@ class StoreLeadTool(BaseTool):
         run_manager: Optional[CallbackManagerForToolRun] = None
     ) -> Dict[str, Any]:
         """Run the tool."""
-        logger.info(f"StoreLeadTool called with name: {name}, contact: {contact}")
+        logger.debug("StoreLeadTool called with name: %s, contact: %s", name, contact)
         
         lead_id = store_lead(
             name=name,
@@ -231,6 +793,29 @@ class StoreLeadTool(BaseTool):
             return {"status": "error", "message": "Failed to store lead"}
         
         return {"status": "success", "id": lead_id}
+    
+    async def _arun(
+        self,
+        name: str,
+        contact: str,
+        project_type: str,
+        project_details: Optional[str] = None,
+        estimated_budget: Optional[str] = None,
+        estimated_timeline: Optional[str] = None,
+        follow_up_consent: bool = False,
+        run_manager: Optional[AsyncCallbackManagerForToolRun] = None
+    ) -> Dict[str, Any]:
+        """Run the tool asynchronously, storing the lead in a worker thread."""
+        return await run_in_threadpool(
+            self._run,
+            name=name,
+            contact=contact,
+            project_type=project_type,
+            project_details=project_details,
+            estimated_budget=estimated_budget,
+            estimated_timeline=estimated_timeline,
+            follow_up_consent=follow_up_consent
+        )
 
 
 # Create tool instances for direct use
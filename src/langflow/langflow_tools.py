@@ -12,15 +12,10 @@ from langflow import CustomComponent
 from langflow.interface.tools.base import ToolComponent
 from langflow.interface.tools.util import get_tool_params
 
-# Import our tools
-from src.backend.tools import BudgetTimelineTool, StoreLeadTool
+# Import our tools; the tools are stateless, so every component shares one instance
+from src.backend.tools import budget_timeline_tool, store_lead_tool
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='[%(asctime)s] [%(levelname)s] [%(name)s] - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+# Logging is configured by the application entry points
 logger = logging.getLogger(__name__)
 
 
@@ -43,7 +38,7 @@ class BudgetTimelineToolComponent(ToolComponent):
     
     def build(self, project_type: str) -> BaseTool:
         """Build the tool."""
-        return BudgetTimelineTool()
+        return budget_timeline_tool
 
 
 class StoreLeadToolComponent(ToolComponent):
@@ -111,7 +106,7 @@ class StoreLeadToolComponent(ToolComponent):
         follow_up_consent: bool = False
     ) -> BaseTool:
         """Build the tool."""
-        return StoreLeadTool()
+        return store_lead_tool
 
 
 def register_tools():
@@ -0,0 +1,176 @@
+// Theme toggle functionality
+const themeToggle = document.getElementById('theme-toggle');
+const body = document.body;
+
+// Check for saved theme preference or use preferred color scheme
+const savedTheme = localStorage.getItem('theme') ||
+    (window.matchMedia('(prefers-color-scheme: dark)').matches ? 'dark' : 'light');
+
+// Apply the theme
+if (savedTheme === 'dark') {
+    body.setAttribute('data-theme', 'dark');
+}
+
+// Toggle theme
+themeToggle.addEventListener('click', () => {
+    if (body.getAttribute('data-theme') === 'dark') {
+        body.removeAttribute('data-theme');
+        localStorage.setItem('theme', 'light');
+    } else {
+        body.setAttribute('data-theme', 'dark');
+        localStorage.setItem('theme', 'dark');
+    }
+});
+
+// Generate a unique client ID
+const clientId = Date.now().toString();
+
+// WebSocket connection
+let socket;
+let reconnectAttempts = 0;
+const maxReconnectAttempts = 3;
+
+// The bot message currently being streamed, and its text so far
+let currentBotMessage = null;
+let currentBotText = '';
+
+function connectWebSocket() {
+    socket = new WebSocket(`ws://${window.location.host}/ws/${clientId}`);
+
+    // WebSocket event handlers
+    socket.onopen = () => {
+        console.log('WebSocket connected');
+        document.getElementById('error-message').style.display = 'none';
+        reconnectAttempts = 0;
+    };
+
+    socket.onmessage = (event) => {
+        const data = JSON.parse(event.data);
+
+        if (data.type === 'chunk') {
+            // Append the streamed text to the current bot message
+            document.getElementById('typing-indicator').style.display = 'none';
+            appendToBotMessage(data.content);
+        } else if (data.type === 'done') {
+            // The response is complete
+            document.getElementById('typing-indicator').style.display = 'none';
+            currentBotMessage = null;
+            currentBotText = '';
+        }
+    };
+
+    socket.onclose = (event) => {
+        console.log('WebSocket closed:', event);
+        if (reconnectAttempts < maxReconnectAttempts) {
+            reconnectAttempts++;
+            setTimeout(connectWebSocket, 1000 * reconnectAttempts);
+        } else {
+            document.getElementById('error-message').style.display = 'block';
+        }
+    };
+
+    socket.onerror = (error) => {
+        console.error('WebSocket error:', error);
+        document.getElementById('error-message').style.display = 'block';
+    };
+}
+
+// Initial connection
+connectWebSocket();
+
+// DOM elements
+const chatMessages = document.getElementById('chat-messages');
+const userInput = document.getElementById('user-input');
+const sendButton = document.getElementById('send-button');
+const retryButton = document.getElementById('retry-button');
+const typingIndicator = document.getElementById('typing-indicator');
+
+// Retry connection
+retryButton.addEventListener('click', () => {
+    document.getElementById('error-message').style.display = 'none';
+    reconnectAttempts = 0;
+    connectWebSocket();
+});
+
+// Send message function
+function sendMessage() {
+    const message = userInput.value.trim();
+    if (message) {
+        // Add user message to chat
+        addMessage(message, 'user');
+
+        // Show typing indicator
+        typingIndicator.style.display = 'block';
+
+        // Send message to server if socket is open
+        if (socket.readyState === WebSocket.OPEN) {
+            socket.send(message);
+        } else {
+            document.getElementById('error-message').style.display = 'block';
+            typingIndicator.style.display = 'none';
+        }
+
+        // Clear input
+        userInput.value = '';
+    }
+}
+
+// Add message to chat
+function addMessage(message, sender) {
+    const messageElement = document.createElement('div');
+    messageElement.classList.add('message');
+    messageElement.classList.add(sender === 'user' ? 'user-message' : 'bot-message');
+
+    // If it's a bot message, render markdown
+    if (sender === 'bot') {
+        renderMarkdown(messageElement, message);
+    } else {
+        messageElement.textContent = message;
+    }
+
+    chatMessages.appendChild(messageElement);
+
+    // Scroll to bottom
+    chatMessages.scrollTop = chatMessages.scrollHeight;
+
+    return messageElement;
+}
+
+// Append a streamed chunk to the current bot message
+function appendToBotMessage(chunk) {
+    if (!currentBotMessage) {
+        currentBotMessage = addMessage('', 'bot');
+        currentBotText = '';
+    }
+
+    currentBotText += chunk;
+    renderMarkdown(currentBotMessage, currentBotText);
+
+    // Scroll to bottom
+    chatMessages.scrollTop = chatMessages.scrollHeight;
+}
+
+// Render markdown into a message element
+function renderMarkdown(messageElement, message) {
+    messageElement.innerHTML = marked.parse(message);
+
+    // Make links open in new tab
+    const links = messageElement.querySelectorAll('a');
+    links.forEach(link => {
+        link.setAttribute('target', '_blank');
+        link.setAttribute('rel', 'noopener noreferrer');
+    });
+}
+
+// Event listeners
+sendButton.addEventListener('click', sendMessage);
+userInput.addEventListener('keypress', (e) => {
+    if (e.key === 'Enter') {
+        sendMessage();
+    }
+});
+
+// Focus input on page load
+window.onload = () => {
+    userInput.focus();
+};
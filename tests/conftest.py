@@ -0,0 +1,91 @@
+"""
+Shared pytest configuration and fixtures.
+
+This module is loaded before the test modules, so it can set up the environment they import with.
+The database fixtures run the database functions against in-memory SQLite.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Make the src package importable from the tests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Give each pytest-xdist worker its own SQLite database instead of sharing database.db
+_worker = os.getenv('PYTEST_XDIST_WORKER', 'main')
+os.environ['DB_PATH'] = 'sqlite:///' + os.path.join(tempfile.gettempdir(), f'chatbot_test_{_worker}.db')
+
+
+def _memory_engine(create_tables=True):
+    """Create an in-memory SQLite engine with working SAVEPOINTs, optionally with the tables."""
+    from src.backend.database import Base
+    
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    
+    # pysqlite starts transactions lazily on its own, which breaks SAVEPOINT; let SQLAlchemy emit BEGIN
+    @event.listens_for(engine, "connect")
+    def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+    
+    @event.listens_for(engine, "begin")
+    def _emit_begin(connection):
+        connection.exec_driver_sql("BEGIN")
+    
+    if create_tables:
+        Base.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture(scope="session")
+def engine():
+    """An in-memory SQLite engine shared by the whole test session."""
+    engine = _memory_engine()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db_session(engine, monkeypatch):
+    """
+    Point the database module at the shared in-memory engine for one test.
+    
+    The test runs inside a transaction that is rolled back afterwards; commits made by
+    the code under test only release a SAVEPOINT. The estimate cache starts empty.
+    """
+    from src.backend import database
+    
+    connection = engine.connect()
+    transaction = connection.begin()
+    session = scoped_session(sessionmaker(
+        bind=connection, expire_on_commit=False, join_transaction_mode="create_savepoint"
+    ))
+    monkeypatch.setattr(database, "Session", session)
+    monkeypatch.setattr(database, "_estimates", None)
+    
+    yield session
+    
+    session.remove()
+    transaction.rollback()
+    connection.close()
+
+
+@pytest.fixture
+def empty_database(monkeypatch):
+    """Point the database module at its own empty in-memory database, for initialize_database."""
+    from src.backend import database
+    
+    engine = _memory_engine(create_tables=False)
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "Session", scoped_session(sessionmaker(bind=engine, expire_on_commit=False)))
+    monkeypatch.setattr(database, "_estimates", None)
+    
+    yield engine
+    
+    database.Session.remove()
+    engine.dispose()
@@ -5,19 +5,23 @@ This module contains tests for the API endpoints.
 """
 
 import pytest
-import sys
-import os
+from datetime import datetime
+from contextlib import asynccontextmanager
 from unittest.mock import patch, MagicMock
 from fastapi.testclient import TestClient
 
-# Add the src directory to the path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
-from src.backend.main import app
+from src.backend.main import create_app
 from src.backend.api import LeadCreate
 
+
+@asynccontextmanager
+async def null_lifespan(app):
+    """Lifespan that skips database initialization; the database calls are mocked."""
+    yield
+
+
 # Create a test client
-client = TestClient(app)
+client = TestClient(create_app(lifespan=null_lifespan))
 
 
 class TestHealthEndpoint:
@@ -36,7 +40,7 @@ class TestHealthEndpoint:
 class TestEstimatesEndpoint:
     """Tests for the estimates endpoint."""
 
-    @patch('src.backend.api.get_estimate')
+    @patch('src.backend.api.aget_estimate')
     def test_get_estimates_success(self, mock_get_estimate):
         """Test that the estimates endpoint returns the correct estimate."""
         # Arrange
@@ -58,7 +62,7 @@ class TestEstimatesEndpoint:
         assert response.json() == expected_response
         mock_get_estimate.assert_called_once_with('e-commerce website')
 
-    @patch('src.backend.api.get_estimate')
+    @patch('src.backend.api.aget_estimate')
     def test_get_estimates_no_match(self, mock_get_estimate):
         """Test that the estimates endpoint returns a default response when no match is found."""
         # Arrange
@@ -78,6 +82,31 @@ class TestEstimatesEndpoint:
         assert response.json() == mock_estimate
         mock_get_estimate.assert_called_once_with('something completely different')
 
+    @patch('src.backend.api.aget_estimate')
+    def test_get_estimates_not_modified(self, mock_get_estimate):
+        """Test that the estimates endpoint returns 304 when the client's ETag matches."""
+        # Arrange
+        mock_get_estimate.return_value = {
+            'project_type': 'e-commerce website',
+            'budget_range': '$3k-$6k',
+            'typical_timeline': '2-3 months'
+        }
+        first = client.get("/api/estimates?project_type=e-commerce%20website")
+        etag = first.headers['ETag']
+        
+        # Act
+        response = client.get(
+            "/api/estimates?project_type=e-commerce%20website",
+            headers={'If-None-Match': etag}
+        )
+        
+        # Assert
+        assert first.headers['Cache-Control'] == 'public, max-age=300'
+        assert etag.startswith('W/"')
+        assert response.status_code == 304
+        assert response.headers['ETag'] == etag
+        assert response.content == b''
+
     def test_get_estimates_missing_parameter(self):
         """Test that the estimates endpoint returns a 422 status code when the project_type parameter is missing."""
         # Act
@@ -171,8 +200,8 @@ class TestLeadsEndpoint:
                 'estimated_budget': '$3k-$6k',
                 'estimated_timeline': '2-3 months',
                 'follow_up_consent': True,
-                'created_at': '2023-01-01T00:00:00',
-                'updated_at': '2023-01-01T00:00:00'
+                'created_at': datetime(2023, 1, 1),
+                'updated_at': datetime(2023, 1, 1)
             }
         ]
         mock_get_all_leads.return_value = mock_leads
@@ -182,8 +211,34 @@ class TestLeadsEndpoint:
         
         # Assert
         assert response.status_code == 200
-        assert response.json() == {'leads': mock_leads}
-        mock_get_all_leads.assert_called_once()
+        assert response.json() == {
+            'leads': [{**mock_leads[0], 'created_at': '2023-01-01T00:00:00', 'updated_at': '2023-01-01T00:00:00'}]
+        }
+        mock_get_all_leads.assert_called_once_with(limit=100, offset=0)
+
+    @patch('src.backend.api.get_all_leads')
+    def test_get_leads_pagination(self, mock_get_all_leads):
+        """Test that the leads endpoint passes the page parameters through."""
+        # Arrange
+        mock_get_all_leads.return_value = []
+        
+        # Act
+        response = client.get("/api/leads", params={"limit": 10, "offset": 20})
+        
+        # Assert
+        assert response.status_code == 200
+        assert response.json() == {'leads': []}
+        mock_get_all_leads.assert_called_once_with(limit=10, offset=20)
+
+    @patch('src.backend.api.get_all_leads')
+    def test_get_leads_invalid_limit(self, mock_get_all_leads):
+        """Test that the leads endpoint rejects a limit above the maximum page size."""
+        # Act
+        response = client.get("/api/leads", params={"limit": 5000})
+        
+        # Assert
+        assert response.status_code == 422
+        mock_get_all_leads.assert_not_called()
 
     @patch('src.backend.api.get_all_leads')
     def test_get_leads_failure(self, mock_get_all_leads):
@@ -0,0 +1,77 @@
+"""
+Tests for the chat message history.
+
+This module contains tests for the token-bounded history shared by the web interfaces. A
+whitespace tokenizer stands in for tiktoken.
+"""
+
+from types import SimpleNamespace
+
+from langchain_core.messages import SystemMessage
+
+from src.backend.chat_history import IncrementalChatMessageHistory
+
+
+class _History(IncrementalChatMessageHistory):
+    """History that counts one token per word and keeps at most four messages."""
+    token_encoding = SimpleNamespace(encode=str.split)
+    max_memory_tokens = 6
+    max_messages = 4
+    role_prefixes = {"human": "User: ", "ai": "AI: "}
+
+
+class TestIncrementalChatMessageHistory:
+    """Tests for the IncrementalChatMessageHistory class."""
+
+    def test_memory_keeps_newest_lines_within_budget(self):
+        """Test that the transcript drops the oldest lines once it exceeds the token budget."""
+        # Arrange
+        history = _History()
+        
+        # Act
+        history.add_user_message('hello there')
+        history.add_ai_message('hi')
+        history.add_user_message('how are you')
+        
+        # Assert
+        assert history.memory == 'AI: hi\nUser: how are you'
+
+    def test_messages_are_capped(self):
+        """Test that only the newest max_messages messages are kept."""
+        # Arrange
+        history = _History()
+        
+        # Act
+        for number in range(6):
+            history.add_user_message(f'message {number}')
+        
+        # Assert
+        assert [message.content for message in history.messages] == [
+            'message 2', 'message 3', 'message 4', 'message 5'
+        ]
+
+    def test_other_message_types_are_left_out_of_memory(self):
+        """Test that messages without a transcript prefix are kept but not added to the transcript."""
+        # Arrange
+        history = _History()
+        
+        # Act
+        history.add_message(SystemMessage(content='be brief'))
+        history.add_user_message('hello')
+        
+        # Assert
+        assert len(history.messages) == 2
+        assert history.memory == 'User: hello'
+
+    def test_clear(self):
+        """Test that clearing the history also clears the transcript."""
+        # Arrange
+        history = _History()
+        history.add_user_message('hello')
+        
+        # Act
+        history.clear()
+        
+        # Assert
+        assert history.messages == []
+        assert history.memory == ''
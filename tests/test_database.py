@@ -1,156 +1,122 @@
 """
 Tests for the database operations.
 
-This module contains tests for the database operations.
+This module contains tests for the database operations. They run against an in-memory
+SQLite database (see the fixtures in conftest.py), with each test rolled back afterwards.
 """
 
 import pytest
-import sys
-import os
-import sqlite3
-from unittest.mock import patch, MagicMock
-
-# Add the src directory to the path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from unittest.mock import patch
+from sqlalchemy import inspect
 
+from src.backend import database
 from src.backend.database import (
     initialize_database,
     get_all_project_types,
     get_estimate_by_project_type,
     store_lead,
+    add_project_estimate,
+    SEED_ESTIMATES,
     ProjectEstimate,
     Lead
 )
 
 
+def _add_estimates(session, *rows):
+    """Insert project_estimates rows directly, bypassing the estimate cache."""
+    session.add_all(
+        ProjectEstimate(project_type=project_type, budget_range=budget_range, typical_timeline=typical_timeline)
+        for project_type, budget_range, typical_timeline in rows
+    )
+    session.commit()
+
+
+def _raise_exception(*args, **kwargs):
+    """Stand-in for a database call that fails."""
+    raise Exception('Test exception')
+
+
 class TestInitializeDatabase:
     """Tests for the initialize_database function."""
 
-    @patch('src.backend.database.Base.metadata.create_all')
-    @patch('src.backend.database.Session')
-    def test_initialize_database_success(self, mock_session, mock_create_all):
-        """Test that the database is initialized successfully."""
+    @pytest.mark.parametrize("existing_rows,fail,expected,expected_types", [
+        ((), False, True, [row['project_type'] for row in SEED_ESTIMATES]),
+        ((('web portal', '$1k-$2k', '1 month'),), False, True, ['web portal']),
+        ((), True, False, None),
+    ], ids=["empty", "already_populated", "exception"])
+    def test_initialize_database(self, existing_rows, fail, expected, expected_types, empty_database, monkeypatch):
+        """Test that the tables are created and seeded only when project_estimates is empty."""
         # Arrange
-        mock_session_instance = MagicMock()
-        mock_session.return_value = mock_session_instance
-        mock_session_instance.query.return_value.count.return_value = 0
+        if existing_rows:
+            database.Base.metadata.create_all(empty_database)
+            with database.session_scope() as session:
+                _add_estimates(session, *existing_rows)
+        if fail:
+            monkeypatch.setattr(database.Base.metadata, 'create_all', _raise_exception)
         
         # Act
         result = initialize_database()
         
         # Assert
-        assert result is True
-        mock_create_all.assert_called_once()
-        mock_session_instance.add_all.assert_called_once()
-        mock_session_instance.commit.assert_called_once()
-        mock_session_instance.close.assert_called_once()
-
-    @patch('src.backend.database.Base.metadata.create_all')
-    @patch('src.backend.database.Session')
-    def test_initialize_database_already_populated(self, mock_session, mock_create_all):
-        """Test that the database is not populated if it already has data."""
-        # Arrange
-        mock_session_instance = MagicMock()
-        mock_session.return_value = mock_session_instance
-        mock_session_instance.query.return_value.count.return_value = 5
-        
-        # Act
-        result = initialize_database()
-        
-        # Assert
-        assert result is True
-        mock_create_all.assert_called_once()
-        mock_session_instance.add_all.assert_not_called()
-        mock_session_instance.commit.assert_not_called()
-        mock_session_instance.close.assert_called_once()
-
-    @patch('src.backend.database.Base.metadata.create_all')
-    @patch('src.backend.database.Session')
-    def test_initialize_database_exception(self, mock_session, mock_create_all):
-        """Test that exceptions are handled gracefully."""
-        # Arrange
-        mock_create_all.side_effect = Exception('Test exception')
-        
-        # Act
-        result = initialize_database()
-        
-        # Assert
-        assert result is False
-        mock_create_all.assert_called_once()
+        assert result is expected
+        if expected_types is not None:
+            assert {'project_estimates', 'leads'} <= set(inspect(empty_database).get_table_names())
+            with database.session_scope() as session:
+                assert [estimate.project_type for estimate in session.query(ProjectEstimate)] == expected_types
+            assert get_all_project_types() == expected_types
 
 
+@pytest.mark.usefixtures('db_session')
 class TestGetAllProjectTypes:
     """Tests for the get_all_project_types function."""
 
-    @patch('src.backend.database.Session')
-    def test_get_all_project_types_success(self, mock_session):
+    def test_get_all_project_types_success(self, db_session):
         """Test that all project types are returned successfully."""
         # Arrange
-        mock_session_instance = MagicMock()
-        mock_session.return_value = mock_session_instance
-        mock_project_estimate_1 = MagicMock()
-        mock_project_estimate_1.project_type = 'e-commerce website'
-        mock_project_estimate_2 = MagicMock()
-        mock_project_estimate_2.project_type = 'mobile restaurant app'
-        mock_session_instance.query.return_value.all.return_value = [
-            mock_project_estimate_1,
-            mock_project_estimate_2
-        ]
+        _add_estimates(
+            db_session,
+            ('e-commerce website', '$3k-$6k', '2-3 months'),
+            ('mobile restaurant app', '$5k-$8k', '3-4 months')
+        )
         
         # Act
         result = get_all_project_types()
         
         # Assert
         assert result == ['e-commerce website', 'mobile restaurant app']
-        mock_session_instance.query.assert_called_once_with(ProjectEstimate)
-        mock_session_instance.close.assert_called_once()
 
-    @patch('src.backend.database.Session')
-    def test_get_all_project_types_empty(self, mock_session):
+    def test_get_all_project_types_empty(self):
         """Test that an empty list is returned when there are no project types."""
-        # Arrange
-        mock_session_instance = MagicMock()
-        mock_session.return_value = mock_session_instance
-        mock_session_instance.query.return_value.all.return_value = []
-        
         # Act
         result = get_all_project_types()
         
         # Assert
         assert result == []
-        mock_session_instance.query.assert_called_once_with(ProjectEstimate)
-        mock_session_instance.close.assert_called_once()
 
-    @patch('src.backend.database.Session')
-    def test_get_all_project_types_exception(self, mock_session):
-        """Test that exceptions are handled gracefully."""
+    def test_get_all_project_types_cached(self, db_session):
+        """Test that repeated calls are served from memory."""
         # Arrange
-        mock_session_instance = MagicMock()
-        mock_session.return_value = mock_session_instance
-        mock_session_instance.query.side_effect = Exception('Test exception')
+        _add_estimates(db_session, ('CRM system', '$4k-$7k', '4-6 months'))
         
         # Act
-        result = get_all_project_types()
+        first = get_all_project_types()
+        add_project_estimate('web portal', '$1k-$2k', '1 month')
+        _add_estimates(db_session, ('not yet cached', '$1k', '1 week'))
+        second = get_all_project_types()
         
         # Assert
-        assert result == []
-        mock_session_instance.query.assert_called_once_with(ProjectEstimate)
+        assert first == ['CRM system']
+        assert second == ['CRM system', 'web portal']
 
 
+@pytest.mark.usefixtures('db_session')
 class TestGetEstimateByProjectType:
     """Tests for the get_estimate_by_project_type function."""
 
-    @patch('src.backend.database.Session')
-    def test_get_estimate_by_project_type_success(self, mock_session):
+    def test_get_estimate_by_project_type_success(self, db_session):
         """Test that the correct estimate is returned for a project type."""
         # Arrange
-        mock_session_instance = MagicMock()
-        mock_session.return_value = mock_session_instance
-        mock_project_estimate = MagicMock()
-        mock_project_estimate.project_type = 'e-commerce website'
-        mock_project_estimate.budget_range = '$3k-$6k'
-        mock_project_estimate.typical_timeline = '2-3 months'
-        mock_session_instance.query.return_value.filter.return_value.first.return_value = mock_project_estimate
+        _add_estimates(db_session, ('e-commerce website', '$3k-$6k', '2-3 months'))
         
         # Act
         result = get_estimate_by_project_type('e-commerce website')
@@ -161,88 +127,143 @@ class TestGetEstimateByProjectType:
             'budget_range': '$3k-$6k',
             'typical_timeline': '2-3 months'
         }
-        mock_session_instance.query.assert_called_once_with(ProjectEstimate)
-        mock_session_instance.close.assert_called_once()
 
-    @patch('src.backend.database.Session')
-    def test_get_estimate_by_project_type_not_found(self, mock_session):
+    def test_get_estimate_by_project_type_not_found(self, db_session):
         """Test that None is returned when the project type is not found."""
         # Arrange
-        mock_session_instance = MagicMock()
-        mock_session.return_value = mock_session_instance
-        mock_session_instance.query.return_value.filter.return_value.first.return_value = None
+        _add_estimates(db_session, ('e-commerce website', '$3k-$6k', '2-3 months'))
         
         # Act
         result = get_estimate_by_project_type('nonexistent project type')
         
         # Assert
         assert result is None
-        mock_session_instance.query.assert_called_once_with(ProjectEstimate)
-        mock_session_instance.close.assert_called_once()
 
-    @patch('src.backend.database.Session')
-    def test_get_estimate_by_project_type_exception(self, mock_session):
-        """Test that exceptions are handled gracefully."""
+    def test_get_estimate_by_project_type_cached(self, db_session):
+        """Test that lookups are case-insensitive substring matches served from memory."""
         # Arrange
-        mock_session_instance = MagicMock()
-        mock_session.return_value = mock_session_instance
-        mock_session_instance.query.side_effect = Exception('Test exception')
+        _add_estimates(
+            db_session,
+            ('e-commerce website', '$3k-$6k', '2-3 months'),
+            ('CRM system', '$4k-$7k', '4-6 months')
+        )
         
         # Act
-        result = get_estimate_by_project_type('e-commerce website')
+        first = get_estimate_by_project_type('e-commerce website')
+        loaded_at = database._estimates_loaded_at
+        first['budget_range'] = 'modified'
+        second = get_estimate_by_project_type('  E-Commerce ')
+        third = get_estimate_by_project_type('crm')
         
         # Assert
-        assert result is None
-        mock_session_instance.query.assert_called_once_with(ProjectEstimate)
+        assert second['budget_range'] == '$3k-$6k'
+        assert third['project_type'] == 'CRM system'
+        assert database._estimates_loaded_at == loaded_at
 
+    def test_get_estimate_by_project_type_exact_match_first(self, db_session):
+        """Test that an exact match wins over an earlier substring match."""
+        # Arrange
+        _add_estimates(
+            db_session,
+            ('CRM system', '$4k-$7k', '4-6 months'),
+            ('CRM', '$2k-$3k', '1-2 months')
+        )
+        
+        # Act
+        result = get_estimate_by_project_type(' crm ')
+        
+        # Assert
+        assert result['project_type'] == 'CRM'
+        assert result['budget_range'] == '$2k-$3k'
 
-class TestStoreLead:
-    """Tests for the store_lead function."""
+    @patch('src.backend.database.time.monotonic')
+    def test_get_estimate_by_project_type_reloads_expired_cache(self, mock_monotonic, db_session):
+        """Test that the estimate cache is reloaded once it is older than the TTL."""
+        # Arrange
+        _add_estimates(db_session, ('CRM system', '$4k-$7k', '4-6 months'))
+        mock_monotonic.return_value = 1000.0
+        
+        # Act
+        get_estimate_by_project_type('crm')
+        _add_estimates(db_session, ('web portal', '$1k-$2k', '1 month'))
+        mock_monotonic.return_value = 1000.0 + database.ESTIMATE_CACHE_TTL / 2
+        before_expiry = get_estimate_by_project_type('web portal')
+        mock_monotonic.return_value = 1000.0 + database.ESTIMATE_CACHE_TTL + 1
+        after_expiry = get_estimate_by_project_type('web portal')
+        
+        # Assert
+        assert before_expiry is None
+        assert after_expiry['project_type'] == 'web portal'
 
-    @patch('src.backend.database.Session')
-    def test_store_lead_success(self, mock_session):
-        """Test that a lead is stored successfully."""
+    def test_add_project_estimate_updates_cache(self):
+        """Test that adding a project estimate makes it available to cached lookups."""
         # Arrange
-        mock_session_instance = MagicMock()
-        mock_session.return_value = mock_session_instance
-        mock_lead = MagicMock()
-        mock_lead.id = 1
-        mock_session_instance.add.return_value = None
-        
-        # Mock the Lead class to return our mock_lead
-        with patch('src.backend.database.Lead', return_value=mock_lead):
-            # Act
-            result = store_lead(
-                name='John Doe',
-                contact='john.doe@example.com',
-                project_type='e-commerce website',
-                project_details='I need an online store for my business.',
-                estimated_budget='$3k-$6k',
-                estimated_timeline='2-3 months',
-                follow_up_consent=True
-            )
+        assert get_estimate_by_project_type('web portal') is None
+        
+        # Act
+        add_project_estimate('web portal', '$1k-$2k', '1 month')
+        result = get_estimate_by_project_type('web portal')
         
         # Assert
-        assert result == 1
-        mock_session_instance.add.assert_called_once()
-        mock_session_instance.commit.assert_called_once()
-        mock_session_instance.close.assert_called_once()
+        assert result == {
+            'project_type': 'web portal',
+            'budget_range': '$1k-$2k',
+            'typical_timeline': '1 month'
+        }
+
+
+class TestEstimateCacheErrors:
+    """Tests for the estimate lookups when the estimates can't be loaded."""
 
-    @patch('src.backend.database.Session')
-    def test_store_lead_exception(self, mock_session):
+    @pytest.mark.parametrize("lookup,args,expected", [
+        (get_all_project_types, (), []),
+        (get_estimate_by_project_type, ('e-commerce website',), None),
+    ], ids=["get_all_project_types", "get_estimate_by_project_type"])
+    def test_load_failure(self, lookup, args, expected, db_session):
         """Test that exceptions are handled gracefully."""
         # Arrange
-        mock_session_instance = MagicMock()
-        mock_session.return_value = mock_session_instance
-        mock_session_instance.add.side_effect = Exception('Test exception')
+        with patch('src.backend.database.load_estimates', side_effect=_raise_exception) as mock_load_estimates:
+            # Act
+            result = lookup(*args)
         
+        # Assert
+        assert result == expected
+        mock_load_estimates.assert_called_once()
+
+
+@pytest.mark.usefixtures('db_session')
+class TestStoreLead:
+    """Tests for the store_lead function."""
+
+    def test_store_lead_success(self, db_session):
+        """Test that a lead is stored successfully."""
         # Act
         result = store_lead(
             name='John Doe',
             contact='john.doe@example.com',
+            project_type='e-commerce website',
+            project_details='I need an online store for my business.',
+            estimated_budget='$3k-$6k',
+            estimated_timeline='2-3 months',
+            follow_up_consent=True
+        )
+        
+        # Assert
+        lead = db_session.get(Lead, result)
+        assert lead.name == 'John Doe'
+        assert lead.estimated_budget == '$3k-$6k'
+        assert lead.follow_up_consent is True
+        assert db_session.query(Lead).count() == 1
+
+    def test_store_lead_exception(self, db_session):
+        """Test that exceptions are handled gracefully."""
+        # Act
+        result = store_lead(
+            name=None,
+            contact='john.doe@example.com',
             project_type='e-commerce website'
         )
         
         # Assert
         assert result is None
-        mock_session_instance.add.assert_called_once() 
\ No newline at end of file
+        assert db_session.query(Lead).count() == 0
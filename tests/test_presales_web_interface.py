@@ -0,0 +1,292 @@
+"""
+Tests for the pre-sales chatbot web interface.
+
+This module contains tests for the WebSocket endpoint, the connection manager and the message
+triggers of presales_web_interface.py. The LLM and the tools are replaced by fakes, so no
+requests leave the process.
+"""
+
+import asyncio
+import contextlib
+import os
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.runnables import RunnableLambda
+from starlette.websockets import WebSocketDisconnect
+
+os.environ.setdefault('LITELLM_API_KEY', 'test-key')
+
+try:
+    import presales_web_interface
+except Exception as e:  # e.g. tiktoken can't download its encoding without network access
+    pytest.skip(f"presales_web_interface could not be imported: {e}", allow_module_level=True)
+
+
+@pytest.fixture
+def tools(monkeypatch):
+    """Replace the Budget & Timeline and Store Lead tools with mocks."""
+    budget_timeline_tool = AsyncMock()
+    budget_timeline_tool._arun.return_value = {'budget_range': '$5k - $10k', 'typical_timeline': '4 weeks'}
+    store_lead_tool = AsyncMock()
+    monkeypatch.setattr(presales_web_interface, 'budget_timeline_tool', budget_timeline_tool)
+    monkeypatch.setattr(presales_web_interface, 'store_lead_tool', store_lead_tool)
+    return SimpleNamespace(budget_timeline=budget_timeline_tool, store_lead=store_lead_tool)
+
+
+@pytest.fixture
+def client(monkeypatch, tools):
+    """A test client for a fresh connection manager, with a chain that echoes each message."""
+    monkeypatch.setattr(presales_web_interface, 'manager', presales_web_interface.ConnectionManager())
+    monkeypatch.setattr(presales_web_interface, 'BASE_CHAIN', RunnableLambda(lambda inputs: f"echo: {inputs['input']}"))
+    return TestClient(presales_web_interface.app)
+
+
+def _receive_reply(websocket):
+    """Read chunk frames until the done frame, returning the reply text."""
+    chunks = []
+    while (frame := websocket.receive_json())['type'] != 'done':
+        chunks.append(frame['content'])
+    return ''.join(chunks)
+
+
+def _history(client_id):
+    """The message contents of a client's chat history."""
+    chat_history = presales_web_interface.manager.chat_chains[client_id]['chat_history']
+    return [message.content for message in chat_history.messages]
+
+
+class TestWebSocketEndpoint:
+    """Tests for the /ws/{client_id} endpoint."""
+
+    def test_reply_is_streamed(self, client):
+        """Test that a message is answered and both turns are recorded in the history."""
+        # Act
+        with client.websocket_connect('/ws/alice') as websocket:
+            websocket.send_text('hello')
+            reply = _receive_reply(websocket)
+        
+        # Assert
+        assert reply == 'echo: hello'
+        assert _history('alice') == ['hello', 'echo: hello']
+
+    def test_backlog_is_answered_together(self, client, monkeypatch):
+        """Test that messages queued during a reply are recorded one by one and answered in one turn."""
+        # Arrange
+        release = threading.Event()
+        
+        def _echo(inputs):
+            if inputs['input'] == 'first':
+                # Hold the first reply until the next messages are queued
+                release.wait(timeout=5)
+            return f"echo: {inputs['input']}"
+        monkeypatch.setattr(presales_web_interface, 'BASE_CHAIN', RunnableLambda(_echo))
+        
+        # Act
+        with client.websocket_connect('/ws/alice') as websocket:
+            websocket.send_text('first')
+            websocket.send_text('second')
+            websocket.send_text('third')
+            # Give the endpoint a moment to queue them behind the first message
+            time.sleep(0.2)
+            release.set()
+            replies = [_receive_reply(websocket), _receive_reply(websocket)]
+        
+        # Assert
+        assert replies == ['echo: first', 'echo: second\nthird']
+        assert _history('alice') == ['first', 'echo: first', 'second', 'third', 'echo: second\nthird']
+
+    def test_estimate_request_uses_tool(self, client, tools):
+        """Test that asking for a budget answers with the Budget & Timeline Tool's estimate."""
+        # Act
+        with client.websocket_connect('/ws/alice') as websocket:
+            websocket.send_text('We need an e-commerce website. What would it cost?')
+            reply = _receive_reply(websocket)
+        
+        # Assert
+        tools.budget_timeline._arun.assert_awaited_once_with('e-commerce website')
+        assert '- Budget Range: $5k - $10k' in reply
+        assert '- Typical Timeline: 4 weeks' in reply
+        assert _history('alice')[-1] == reply
+
+    def test_send_failure_closes_connection(self, client, monkeypatch):
+        """Test that the endpoint closes the socket and cleans up when sending a reply fails."""
+        # Arrange
+        async def _failing_send(*args, **kwargs):
+            raise RuntimeError('socket closed')
+        monkeypatch.setattr(presales_web_interface.manager, 'send_message', _failing_send)
+        
+        # Act
+        with client.websocket_connect('/ws/alice') as websocket:
+            websocket.send_text('hello')
+            with pytest.raises(WebSocketDisconnect) as disconnect:
+                websocket.receive_json()
+        
+        # Assert
+        assert disconnect.value.code == 1011
+        assert 'alice' not in presales_web_interface.manager.active_connections
+
+    def test_connections_sharing_a_session(self, client):
+        """Test that replies go to the connection that asked, and survive another one closing."""
+        # Act
+        with client.websocket_connect('/ws/alice') as first:
+            with client.websocket_connect('/ws/alice') as second:
+                first.send_text('from first')
+                first_reply = _receive_reply(first)
+                second.send_text('from second')
+                second_reply = _receive_reply(second)
+            
+            first.send_text('after second left')
+            last_reply = _receive_reply(first)
+        
+        # Assert
+        assert first_reply == 'echo: from first'
+        assert second_reply == 'echo: from second'
+        assert last_reply == 'echo: after second left'
+        assert _history('alice')[::2] == ['from first', 'from second', 'after second left']
+        assert 'alice' not in presales_web_interface.manager.active_connections
+
+    def test_reconnect_keeps_session(self, client):
+        """Test that a reconnecting client keeps its conversation, and closing the old socket spares the new one."""
+        # Act
+        with contextlib.ExitStack() as stack:
+            with client.websocket_connect('/ws/alice') as old:
+                old.send_text('before')
+                _receive_reply(old)
+                # The new connection opens before the old one closes
+                new = stack.enter_context(client.websocket_connect('/ws/alice'))
+            
+            new.send_text('after')
+            reply = _receive_reply(new)
+            connected = 'alice' in presales_web_interface.manager.active_connections
+        
+        # Assert
+        assert reply == 'echo: after'
+        assert connected
+        assert _history('alice') == ['before', 'echo: before', 'after', 'echo: after']
+
+
+def test_drain_queue():
+    """Test that drain_queue returns the message with everything queued behind it, and empties the queue."""
+    # Arrange
+    queue = asyncio.Queue()
+    queue.put_nowait('second')
+    queue.put_nowait('third')
+    
+    # Act
+    messages = presales_web_interface.drain_queue(queue, 'first')
+    
+    # Assert
+    assert messages == ['first', 'second', 'third']
+    assert queue.empty()
+
+
+class TestConnectionManager:
+    """Tests for the ConnectionManager class."""
+
+    @pytest.fixture
+    def manager(self, tools):
+        """A connection manager with no connections."""
+        return presales_web_interface.ConnectionManager()
+
+    def test_scan_history_is_cached(self, manager):
+        """Test that the history scan is reused until a message is added."""
+        # Arrange
+        chain_data = presales_web_interface.build_chain_from_langflow('alice')
+        chain_data['chat_history'].add_user_message('My name is Alice')
+        
+        # Act
+        first = manager.scan_history(chain_data)
+        again = manager.scan_history(chain_data)
+        chain_data['chat_history'].add_user_message('alice@example.com')
+        updated = manager.scan_history(chain_data)
+        
+        # Assert
+        assert again is first
+        assert first['contact'] is None
+        assert updated['contact'] == 'alice@example.com'
+
+    def test_lead_info_details_follow_project_type(self, manager):
+        """Test that the project details are the text after the project type mention."""
+        # Arrange
+        chain_data = presales_web_interface.build_chain_from_langflow('alice')
+        chain_data['chat_history'].add_user_message('My name is Alice, alice@example.com')
+        chain_data['chat_history'].add_user_message('We need a mobile app for booking tables')
+        
+        # Act
+        lead_info = manager.extract_lead_info(chain_data)
+        
+        # Assert
+        assert lead_info['name'] == 'Alice'
+        assert lead_info['project_type'] == 'mobile app'
+        assert lead_info['project_details'] == 'for booking tables'
+
+    def test_evict_idle_sessions(self, manager, monkeypatch):
+        """Test that expired sessions are dropped, except for clients that are still connected."""
+        # Arrange
+        monkeypatch.setattr(presales_web_interface, 'SESSION_TTL_SECONDS', 60)
+        now = time.monotonic()
+        manager.chat_chains['expired'] = {'last_seen': now - 120}
+        manager.chat_chains['connected'] = {'last_seen': now - 120}
+        manager.chat_chains['recent'] = {'last_seen': now}
+        manager.active_connections['connected'] = {object()}
+        
+        # Act
+        manager.evict_idle_sessions()
+        
+        # Assert
+        assert list(manager.chat_chains) == ['connected', 'recent']
+
+    def test_evict_idle_sessions_over_capacity(self, manager, monkeypatch):
+        """Test that the least recently used sessions are dropped once MAX_SESSIONS is reached."""
+        # Arrange
+        monkeypatch.setattr(presales_web_interface, 'MAX_SESSIONS', 2)
+        now = time.monotonic()
+        manager.chat_chains['oldest'] = {'last_seen': now - 2}
+        manager.chat_chains['older'] = {'last_seen': now - 1}
+        
+        # Act
+        manager.evict_idle_sessions()
+        
+        # Assert
+        assert list(manager.chat_chains) == ['older']
+
+
+class TestEstimateTriggerPattern:
+    """Tests for ESTIMATE_TRIGGER_PATTERN."""
+
+    @pytest.mark.parametrize('message', [
+        'What is the budget?',
+        'Can you share the timelines?',
+        'What would it cost?',
+        'How much is the estimated price?',
+        'I need an estimation first',
+        'What are you costing this at?',
+        'We are budgeting for next quarter',
+        'Is it costly?',
+    ])
+    def test_matches_inflected_forms(self, message):
+        """Test that estimate keywords trigger the tool in their inflected forms."""
+        # Act
+        match = presales_web_interface.ESTIMATE_TRIGGER_PATTERN.search(message)
+        
+        # Assert
+        assert match is not None
+
+    @pytest.mark.parametrize('message', [
+        'We want an online shop',
+        'Planning a costume party',
+        'Within budgetary limits',
+        'Show the estimator page',
+    ])
+    def test_ignores_unrelated_message(self, message):
+        """Test that unrelated words, even ones starting with an estimate keyword, don't trigger the tool."""
+        # Act
+        match = presales_web_interface.ESTIMATE_TRIGGER_PATTERN.search(message)
+        
+        # Assert
+        assert match is None
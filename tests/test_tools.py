@@ -4,31 +4,50 @@ Tests for the Budget & Timeline Tool.
 This module contains tests for the Budget & Timeline Tool.
 """
 
+import asyncio
 import pytest
-from unittest.mock import patch, MagicMock
-from src.backend.tools import extract_project_type, get_estimate
+from types import SimpleNamespace
+from unittest.mock import patch
+from src.backend import tools
+from src.backend.tools import extract_project_type, aextract_project_type, get_estimate, aget_estimate
+
+
+PROJECT_TYPES = (
+    'e-commerce website',
+    'mobile restaurant app',
+    'CRM system',
+    'chatbot integration',
+    'custom logistics'
+)
+
+MOCK_ESTIMATE = {
+    'project_type': 'e-commerce website',
+    'budget_range': '$3k-$6k',
+    'typical_timeline': '2-3 months'
+}
+
+
+def _completion_response(content):
+    """Build a LiteLLM-style completion response with the given message content."""
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
 
 
 class TestExtractProjectType:
     """Tests for the extract_project_type function."""
 
+    def setup_method(self):
+        """Clear the classification cache so each test calls the mocked LLM."""
+        tools._classification_cache.clear()
+
     @patch('src.backend.tools.get_all_project_types')
     @patch('src.backend.tools.completion')
     def test_exact_match(self, mock_completion, mock_get_all_project_types):
         """Test that an exact match returns the correct project type."""
         # Arrange
-        mock_get_all_project_types.return_value = [
-            'e-commerce website',
-            'mobile restaurant app',
-            'CRM system',
-            'chatbot integration',
-            'custom logistics'
-        ]
+        mock_get_all_project_types.return_value = PROJECT_TYPES
         
         # Mock the LiteLLM response
-        mock_response = MagicMock()
-        mock_response.choices = [MagicMock()]
-        mock_response.choices[0].message.content = "e-commerce website"
+        mock_response = _completion_response("e-commerce website")
         mock_completion.return_value = mock_response
         
         # Act
@@ -44,18 +63,10 @@ class TestExtractProjectType:
     def test_no_match(self, mock_completion, mock_get_all_project_types):
         """Test that no match returns None."""
         # Arrange
-        mock_get_all_project_types.return_value = [
-            'e-commerce website',
-            'mobile restaurant app',
-            'CRM system',
-            'chatbot integration',
-            'custom logistics'
-        ]
+        mock_get_all_project_types.return_value = PROJECT_TYPES
         
         # Mock the LiteLLM response
-        mock_response = MagicMock()
-        mock_response.choices = [MagicMock()]
-        mock_response.choices[0].message.content = "unknown"
+        mock_response = _completion_response("unknown")
         mock_completion.return_value = mock_response
         
         # Act
@@ -84,13 +95,7 @@ class TestExtractProjectType:
     def test_exception_handling(self, mock_completion, mock_get_all_project_types):
         """Test that exceptions are handled properly."""
         # Arrange
-        mock_get_all_project_types.return_value = [
-            'e-commerce website',
-            'mobile restaurant app',
-            'CRM system',
-            'chatbot integration',
-            'custom logistics'
-        ]
+        mock_get_all_project_types.return_value = PROJECT_TYPES
         
         # Mock the LiteLLM response to raise an exception
         mock_completion.side_effect = Exception("Test exception")
@@ -103,56 +108,132 @@ class TestExtractProjectType:
         mock_get_all_project_types.assert_called_once()
         mock_completion.assert_called_once()
 
+    @patch('src.backend.tools.get_all_project_types')
+    @patch('src.backend.tools.completion')
+    def test_cached_classification(self, mock_completion, mock_get_all_project_types):
+        """Test that repeated descriptions reuse the cached classification."""
+        # Arrange
+        mock_get_all_project_types.return_value = ['e-commerce website', 'CRM system']
+        
+        mock_response = _completion_response("CRM system")
+        mock_completion.return_value = mock_response
+        
+        # Act
+        first = extract_project_type("A CRM for my sales team")
+        second = extract_project_type("  a crm for my   SALES team ")
+        
+        # Assert
+        assert first == second == 'CRM system'
+        mock_completion.assert_called_once()
+
+    @patch('src.backend.tools.get_all_project_types')
+    @patch('src.backend.tools.completion')
+    def test_named_project_type_skips_llm(self, mock_completion, mock_get_all_project_types):
+        """Test that a description naming a project type is classified without LiteLLM."""
+        # Arrange
+        mock_get_all_project_types.return_value = ['e-commerce website', 'CRM system']
+        
+        # Act
+        result = extract_project_type("We want a new CRM System for the sales team")
+        
+        # Assert
+        assert result == 'CRM system'
+        mock_completion.assert_not_called()
+
+    @patch('src.backend.tools.get_all_project_types')
+    @patch('src.backend.tools.completion')
+    def test_partial_project_type_skips_llm(self, mock_completion, mock_get_all_project_types):
+        """Test that a description that is part of a project type name is matched without LiteLLM."""
+        # Arrange
+        mock_get_all_project_types.return_value = ['e-commerce website', 'CRM system']
+        
+        # Act
+        exact = extract_project_type("  CRM System ")
+        partial = extract_project_type("crm")
+        
+        # Assert
+        assert exact == partial == 'CRM system'
+        mock_completion.assert_not_called()
+
+    @pytest.mark.parametrize("description", ["e", "app"])
+    @patch('src.backend.tools.get_all_project_types')
+    @patch('src.backend.tools.completion')
+    def test_generic_part_uses_llm(self, mock_completion, mock_get_all_project_types, description):
+        """Test that a short or generic part of a project type name is left to LiteLLM."""
+        # Arrange
+        mock_get_all_project_types.return_value = PROJECT_TYPES
+        mock_completion.return_value = _completion_response("unknown")
+        
+        # Act
+        result = extract_project_type(description)
+        
+        # Assert
+        assert result is None
+        mock_completion.assert_called_once()
+
+    @patch('src.backend.tools.STRUCTURED_OUTPUT', True)
+    @patch('src.backend.tools.get_all_project_types')
+    @patch('src.backend.tools.completion')
+    def test_structured_output(self, mock_completion, mock_get_all_project_types):
+        """Test that the answer is constrained to the project types and parsed as JSON."""
+        # Arrange
+        mock_get_all_project_types.return_value = ['e-commerce website', 'CRM system']
+        
+        mock_response = _completion_response('{"project_type": "CRM system"}')
+        mock_completion.return_value = mock_response
+        
+        # Act
+        result = extract_project_type("Software to track our sales contacts")
+        
+        # Assert
+        assert result == 'CRM system'
+        schema = mock_completion.call_args.kwargs['response_format']['json_schema']['schema']
+        assert schema['properties']['project_type']['enum'] == ['e-commerce website', 'CRM system', 'unknown']
+
+
+@pytest.fixture
+def tools_mocks():
+    """Patch the functions get_estimate depends on, for the duration of a test."""
+    with patch('src.backend.tools.get_estimate_by_project_type') as get_est, \
+            patch('src.backend.tools.extract_project_type') as extract:
+        yield SimpleNamespace(get_est=get_est, extract=extract)
+
 
 class TestGetEstimate:
     """Tests for the get_estimate function."""
 
-    @patch('src.backend.tools.get_estimate_by_project_type')
-    def test_exact_match(self, mock_get_estimate_by_project_type):
+    def test_exact_match(self, tools_mocks):
         """Test that an exact match returns the correct estimate."""
         # Arrange
-        mock_estimate = {
-            'project_type': 'e-commerce website',
-            'budget_range': '$3k-$6k',
-            'typical_timeline': '2-3 months'
-        }
-        mock_get_estimate_by_project_type.return_value = mock_estimate
+        tools_mocks.get_est.return_value = MOCK_ESTIMATE
         
         # Act
         result = get_estimate('e-commerce website')
         
         # Assert
-        assert result == mock_estimate
-        mock_get_estimate_by_project_type.assert_called_once_with('e-commerce website')
+        assert result == MOCK_ESTIMATE
+        tools_mocks.get_est.assert_called_once_with('e-commerce website')
+        tools_mocks.extract.assert_not_called()
 
-    @patch('src.backend.tools.get_estimate_by_project_type')
-    @patch('src.backend.tools.extract_project_type')
-    def test_llm_extraction(self, mock_extract_project_type, mock_get_estimate_by_project_type):
+    def test_llm_extraction(self, tools_mocks):
         """Test that LiteLLM extraction is used when no exact match is found."""
         # Arrange
-        mock_estimate = {
-            'project_type': 'e-commerce website',
-            'budget_range': '$3k-$6k',
-            'typical_timeline': '2-3 months'
-        }
-        mock_get_estimate_by_project_type.side_effect = [None, mock_estimate]
-        mock_extract_project_type.return_value = 'e-commerce website'
+        tools_mocks.get_est.side_effect = [None, MOCK_ESTIMATE]
+        tools_mocks.extract.return_value = 'e-commerce website'
         
         # Act
         result = get_estimate('online shop')
         
         # Assert
-        assert result == mock_estimate
-        mock_get_estimate_by_project_type.assert_called_with('e-commerce website')
-        mock_extract_project_type.assert_called_once_with('online shop')
+        assert result == MOCK_ESTIMATE
+        tools_mocks.get_est.assert_called_with('e-commerce website')
+        tools_mocks.extract.assert_called_once_with('online shop')
 
-    @patch('src.backend.tools.get_estimate_by_project_type')
-    @patch('src.backend.tools.extract_project_type')
-    def test_no_match(self, mock_extract_project_type, mock_get_estimate_by_project_type):
+    def test_no_match(self, tools_mocks):
         """Test that a default response is returned when no match is found."""
         # Arrange
-        mock_get_estimate_by_project_type.return_value = None
-        mock_extract_project_type.return_value = None
+        tools_mocks.get_est.return_value = None
+        tools_mocks.extract.return_value = None
         
         # Act
         result = get_estimate('something completely different')
@@ -162,14 +243,13 @@ class TestGetEstimate:
         assert result['budget_range'] == 'Requires more information'
         assert result['typical_timeline'] == 'Requires more information'
         assert 'message' in result
-        mock_get_estimate_by_project_type.assert_called_once_with('something completely different')
-        mock_extract_project_type.assert_called_once_with('something completely different')
+        tools_mocks.get_est.assert_called_once_with('something completely different')
+        tools_mocks.extract.assert_called_once_with('something completely different')
 
-    @patch('src.backend.tools.get_estimate_by_project_type')
-    def test_exception_handling(self, mock_get_estimate_by_project_type):
+    def test_exception_handling(self, tools_mocks):
         """Test that exceptions are handled properly."""
         # Arrange
-        mock_get_estimate_by_project_type.side_effect = Exception("Test exception")
+        tools_mocks.get_est.side_effect = Exception("Test exception")
         
         # Act
         result = get_estimate('e-commerce website')
@@ -179,4 +259,95 @@ class TestGetEstimate:
         assert result['budget_range'] == 'Unavailable'
         assert result['typical_timeline'] == 'Unavailable'
         assert 'message' in result
-        mock_get_estimate_by_project_type.assert_called_once_with('e-commerce website') 
\ No newline at end of file
+        tools_mocks.get_est.assert_called_once_with('e-commerce website')
+
+
+class TestAsyncGetEstimate:
+    """Tests for the aget_estimate function."""
+
+    def setup_method(self):
+        """Clear the classification cache so each test calls the mocked LLM."""
+        tools._classification_cache.clear()
+
+    @patch('src.backend.tools.get_estimate_by_project_type')
+    @patch('src.backend.tools.get_all_project_types')
+    @patch('src.backend.tools.acompletion')
+    def test_llm_extraction(self, mock_acompletion, mock_get_all_project_types, mock_get_estimate_by_project_type):
+        """Test that the async path awaits LiteLLM when no exact match is found."""
+        # Arrange
+        mock_get_estimate_by_project_type.side_effect = [None, MOCK_ESTIMATE]
+        mock_get_all_project_types.return_value = ['e-commerce website', 'CRM system']
+        
+        mock_response = _completion_response("e-commerce website")
+        mock_acompletion.return_value = mock_response
+        
+        # Act
+        result = asyncio.run(aget_estimate('online shop'))
+        
+        # Assert
+        assert result == MOCK_ESTIMATE
+        mock_acompletion.assert_awaited_once()
+        mock_get_estimate_by_project_type.assert_called_with('e-commerce website')
+
+    @patch('src.backend.tools.get_estimate_by_project_type')
+    def test_exception_handling(self, mock_get_estimate_by_project_type):
+        """Test that exceptions are handled properly."""
+        # Arrange
+        mock_get_estimate_by_project_type.side_effect = Exception("Test exception")
+        
+        # Act
+        result = asyncio.run(aget_estimate('e-commerce website'))
+        
+        # Assert
+        assert result['project_type'] == 'error'
+        assert result['budget_range'] == 'Unavailable'
+
+    @patch('src.backend.tools.get_all_project_types')
+    @patch('src.backend.tools.acompletion')
+    def test_concurrent_classifications_batched(self, mock_acompletion, mock_get_all_project_types):
+        """Test that concurrent classifications share a single LiteLLM call."""
+        # Arrange
+        mock_get_all_project_types.return_value = ['e-commerce website', 'CRM system']
+        
+        mock_response = _completion_response("1: CRM system\n2: unknown\n3: e-commerce website")
+        mock_acompletion.return_value = mock_response
+        
+        async def classify_all():
+            return await asyncio.gather(
+                aextract_project_type("A CRM for my sales team"),
+                aextract_project_type("Something else entirely"),
+                aextract_project_type("An online shop")
+            )
+        
+        # Act
+        results = asyncio.run(classify_all())
+        
+        # Assert
+        assert results == ['CRM system', None, 'e-commerce website']
+        mock_acompletion.assert_awaited_once()
+
+    @patch('src.backend.tools.STRUCTURED_OUTPUT', True)
+    @patch('src.backend.tools.get_all_project_types')
+    @patch('src.backend.tools.acompletion')
+    def test_concurrent_classifications_structured(self, mock_acompletion, mock_get_all_project_types):
+        """Test that a batched JSON answer is mapped back to each description in order."""
+        # Arrange
+        mock_get_all_project_types.return_value = ['e-commerce website', 'CRM system']
+        
+        mock_response = _completion_response('{"project_types": ["unknown", "e-commerce website"]}')
+        mock_acompletion.return_value = mock_response
+        
+        async def classify_all():
+            return await asyncio.gather(
+                aextract_project_type("Something else entirely"),
+                aextract_project_type("An online shop")
+            )
+        
+        # Act
+        results = asyncio.run(classify_all())
+        
+        # Assert
+        assert results == [None, 'e-commerce website']
+        mock_acompletion.assert_awaited_once()
+        items = mock_acompletion.call_args.kwargs['response_format']['json_schema']['schema']['properties']['project_types']
+        assert items['minItems'] == items['maxItems'] == 2
@@ -0,0 +1,123 @@
+"""
+Tests for the memory chatbot web interface.
+
+This module contains tests for the WebSocket endpoint of web_interface.py. The LLM is replaced
+by a fake chat model, so no requests leave the process.
+"""
+
+import os
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.runnables import RunnableLambda
+from starlette.websockets import WebSocketDisconnect
+
+os.environ.setdefault('LITELLM_API_KEY', 'test-key')
+
+try:
+    import web_interface
+except Exception as e:  # e.g. tiktoken can't download its encoding without network access
+    pytest.skip(f"web_interface could not be imported: {e}", allow_module_level=True)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """A test client for a fresh connection manager, with a chain that echoes each message."""
+    monkeypatch.setattr(web_interface, 'manager', web_interface.ConnectionManager())
+    monkeypatch.setattr(web_interface, 'BASE_CHAIN', RunnableLambda(lambda inputs: f"echo: {inputs['input']}"))
+    return TestClient(web_interface.app)
+
+
+def _receive_reply(websocket):
+    """Read chunk frames until the done frame, returning the reply text."""
+    chunks = []
+    while (frame := websocket.receive_json())['type'] != 'done':
+        chunks.append(frame['content'])
+    return ''.join(chunks)
+
+
+class TestWebSocketEndpoint:
+    """Tests for the /ws/{client_id} endpoint."""
+
+    def test_reply_is_streamed(self, client):
+        """Test that a message is answered and both turns are recorded in the history."""
+        # Act
+        with client.websocket_connect('/ws/alice') as websocket:
+            websocket.send_text('hello')
+            reply = _receive_reply(websocket)
+        
+        # Assert
+        assert reply == 'echo: hello'
+        history = web_interface.manager.sessions['alice']['chat_history']
+        assert [message.content for message in history.messages] == ['hello', 'echo: hello']
+
+    def test_backlog_is_answered_together(self, client, monkeypatch):
+        """Test that messages queued during a reply are recorded one by one and answered in one turn."""
+        # Arrange
+        release = threading.Event()
+        
+        def _echo(inputs):
+            if inputs['input'] == 'first':
+                # Hold the first reply until the next messages are queued
+                release.wait(timeout=5)
+            return f"echo: {inputs['input']}"
+        monkeypatch.setattr(web_interface, 'BASE_CHAIN', RunnableLambda(_echo))
+        
+        # Act
+        with client.websocket_connect('/ws/alice') as websocket:
+            websocket.send_text('first')
+            websocket.send_text('second')
+            websocket.send_text('third')
+            # Give the endpoint a moment to queue them behind the first message
+            time.sleep(0.2)
+            release.set()
+            replies = [_receive_reply(websocket), _receive_reply(websocket)]
+        
+        # Assert
+        assert replies == ['echo: first', 'echo: second\nthird']
+        history = web_interface.manager.sessions['alice']['chat_history']
+        assert [message.content for message in history.messages] == [
+            'first', 'echo: first', 'second', 'third', 'echo: second\nthird'
+        ]
+
+    def test_send_failure_closes_connection(self, client, monkeypatch):
+        """Test that the endpoint closes the socket and cleans up when sending a reply fails."""
+        # Arrange
+        async def _failing_send(*args, **kwargs):
+            raise RuntimeError('socket closed')
+        monkeypatch.setattr(web_interface.manager, 'send_message', _failing_send)
+        
+        # Act
+        with client.websocket_connect('/ws/alice') as websocket:
+            websocket.send_text('hello')
+            with pytest.raises(WebSocketDisconnect) as disconnect:
+                websocket.receive_json()
+        
+        # Assert
+        assert disconnect.value.code == 1011
+        assert 'alice' not in web_interface.manager.active_connections
+
+    def test_connections_sharing_a_session(self, client):
+        """Test that replies go to the connection that asked, and survive another one closing."""
+        # Act
+        with client.websocket_connect('/ws/alice') as first:
+            with client.websocket_connect('/ws/alice') as second:
+                first.send_text('from first')
+                first_reply = _receive_reply(first)
+                second.send_text('from second')
+                second_reply = _receive_reply(second)
+            
+            first.send_text('after second left')
+            last_reply = _receive_reply(first)
+        
+        # Assert
+        assert first_reply == 'echo: from first'
+        assert second_reply == 'echo: from second'
+        assert last_reply == 'echo: after second left'
+        history = web_interface.manager.sessions['alice']['chat_history']
+        assert [message.content for message in history.messages][::2] == [
+            'from first', 'from second', 'after second left'
+        ]
+        assert 'alice' not in web_interface.manager.active_connections
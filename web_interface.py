@@ -6,38 +6,39 @@ This script implements a web interface for the LangFlow Memory Chatbot using Fas
 It loads the LangFlow JSON configuration and uses it to create a chatbot that maintains conversation history.
 """
 
-import json
+import asyncio
+import contextlib
+import functools
+import hashlib
 import os
 import logging
+import time
 import uuid
-from typing import Dict, List, Optional
+from collections import OrderedDict
+from typing import Any, Dict, List, Set
 
-import uvicorn
+import orjson
+import tiktoken
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request, Depends, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse, Response
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
 # Import LangChain components
 from langchain.prompts import PromptTemplate
 from langchain_openai import ChatOpenAI
-from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.messages import HumanMessage, AIMessage
 from langchain_core.chat_history import BaseChatMessageHistory
-from langchain_community.chat_message_histories import ChatMessageHistory
+from src.backend.chat_history import IncrementalChatMessageHistory
+from src.backend.logging_config import configure_logging
 
 # Load environment variables
 load_dotenv()
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='[%(asctime)s] [%(levelname)s] [%(name)s] - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Get OpenAI API key from environment variables
@@ -49,593 +50,326 @@ if not OPENAI_API_KEY:
 # Create FastAPI app
 app = FastAPI(title="LangFlow Memory Chatbot")
 
-# Create templates directory if it doesn't exist
-os.makedirs("templates", exist_ok=True)
-
-# Create templates
-templates = Jinja2Templates(directory="templates")
+# Compress the page and its assets; WebSocket traffic is not affected
+app.add_middleware(GZipMiddleware, minimum_size=500)
 
-# Create static directory if it doesn't exist
-os.makedirs("static", exist_ok=True)
-os.makedirs("static/css", exist_ok=True)
-os.makedirs("static/js", exist_ok=True)
-
-# Mount static files
+# Mount static files; static/ ships with the repository, along with the chat page
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-# Load LangFlow JSON configuration
+# Load LangFlow JSON configuration; the file is only read once, and callers must not modify the result
+@functools.lru_cache(maxsize=1)
 def load_langflow_config():
-    with open("src/langflow/flows/LangFlow_Memory_Chatbot.json", "r") as file:
-        return json.load(file)
+    with open("src/langflow/flows/LangFlow_Memory_Chatbot.json", "rb") as file:
+        return orjson.loads(file.read())
 
-# Extract components from LangFlow JSON
-def build_chain_from_langflow(flow_config, session_id: str):
-    # Find the prompt template
-    prompt_template = None
-    for node in flow_config["data"]["nodes"]:
-        if node["type"] == "Prompt":
-            prompt_template = node["data"]["node"]["template"]["template"]["value"]
-            break
-    
-    if not prompt_template:
-        prompt_template = "You are a helpful assistant that answers questions.\n\nUse markdown to format your answer, properly embedding images and urls.\n\nHistory: \n\n{memory}\n"
-    
-    # Create prompt template
-    prompt = PromptTemplate.from_template(prompt_template)
-    
-    # Find the OpenAI model configuration
-    model_name = "gpt-4o-mini"
-    temperature = 0.1
-    
+DEFAULT_PROMPT_TEMPLATE = "You are a helpful assistant that answers questions.\n\nUse markdown to format your answer, properly embedding images and urls.\n\nHistory: \n\n{memory}\n"
+
+# Extract the chain settings from the LangFlow JSON, in a single pass over the nodes
+def extract_flow_settings(flow_config):
+    # Index the nodes by type; the first node of each type wins
+    nodes_by_type = {}
     for node in flow_config["data"]["nodes"]:
-        if node["type"] == "OpenAIModel":
-            model_name = node["data"]["node"]["template"]["model_name"]["value"]
-            temperature = node["data"]["node"]["template"]["temperature"]["value"]
-            break
-    
-    # Create chat message history
-    chat_history = ChatMessageHistory()
+        nodes_by_type.setdefault(node["type"], node)
     
-    # Create LLM
-    llm = ChatOpenAI(
-        model_name=model_name,
-        temperature=temperature,
-        api_key=OPENAI_API_KEY
-    )
+    settings = {
+        "prompt_template": DEFAULT_PROMPT_TEMPLATE,
+        "model_name": "gpt-4o-mini",
+        "temperature": 0.1
+    }
     
-    # Create a function to get memory
-    def get_memory(input_dict):
-        messages = chat_history.messages
-        if not messages:
-            return ""
-        
-        # Format messages as a string
-        formatted_messages = []
-        for message in messages:
-            if isinstance(message, HumanMessage):
-                formatted_messages.append(f"Human: {message.content}")
-            elif isinstance(message, AIMessage):
-                formatted_messages.append(f"AI: {message.content}")
-        
-        return "\n".join(formatted_messages)
+    prompt_node = nodes_by_type.get("Prompt")
+    if prompt_node and prompt_node["data"]["node"]["template"]["template"]["value"]:
+        settings["prompt_template"] = prompt_node["data"]["node"]["template"]["template"]["value"]
     
-    # Create chain using the modern RunnableSequence approach
-    chain = (
-        {
-            "memory": get_memory,
-            "input": lambda x: x["input"]
-        }
-        | prompt
-        | llm
-        | StrOutputParser()
-    )
+    model_node = nodes_by_type.get("OpenAIModel")
+    if model_node:
+        settings["model_name"] = model_node["data"]["node"]["template"]["model_name"]["value"]
+        settings["temperature"] = model_node["data"]["node"]["template"]["temperature"]["value"]
     
-    # Return both the chain and chat history
-    return {"chain": chain, "chat_history": chat_history}
+    return settings
+
+FLOW_SETTINGS = extract_flow_settings(load_langflow_config())
+
+# Create prompt template
+PROMPT = PromptTemplate.from_template(FLOW_SETTINGS["prompt_template"])
+
+# Create the LLM once and share it (and its HTTP connection pool) across all sessions
+LLM = ChatOpenAI(
+    model_name=FLOW_SETTINGS["model_name"],
+    temperature=FLOW_SETTINGS["temperature"],
+    api_key=OPENAI_API_KEY,
+    # Bound how long a stalled request can hold a session's turn
+    max_retries=2,
+    timeout=60
+)
+
+# Chain shared by every session; each call passes in the session's memory with the input
+BASE_CHAIN = PROMPT | LLM | StrOutputParser()
+
+# Maximum number of tokens of recent conversation included in the prompt
+MAX_MEMORY_TOKENS = int(os.getenv('MEMORY_TOKEN_BUDGET', '1500'))
+
+# Maximum number of messages kept per session
+MAX_HISTORY_MESSAGES = int(os.getenv('MAX_HISTORY_MESSAGES', '200'))
+
+# Tokenizer used to measure the history window
+try:
+    TOKEN_ENCODING = tiktoken.encoding_for_model(FLOW_SETTINGS["model_name"])
+except KeyError:
+    TOKEN_ENCODING = tiktoken.get_encoding("cl100k_base")
+
+# Chat message history with this chatbot's tokenizer, limits and transcript prefixes
+class MemoryChatMessageHistory(IncrementalChatMessageHistory):
+    token_encoding = TOKEN_ENCODING
+    max_memory_tokens = MAX_MEMORY_TOKENS
+    max_messages = MAX_HISTORY_MESSAGES
+    role_prefixes = {"human": "Human: ", "ai": "AI: "}
+
+# Create the per-session state; the prompt, LLM and chain are shared by every session
+def create_session():
+    # The turn lock lets a session answer one message at a time, even across several connections
+    return {"chat_history": MemoryChatMessageHistory(), "turn_lock": asyncio.Lock()}
+
+# Limits for the per-client chat sessions kept in memory
+MAX_SESSIONS = int(os.getenv('MAX_SESSIONS', '1000'))
+SESSION_TTL_SECONDS = int(os.getenv('SESSION_TTL_SECONDS', '3600'))
+
+# Number of responses kept for repeated prompts (0 disables the cache)
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '256'))
 
 # Connection manager for WebSockets
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
-        self.chat_chains: Dict[str, object] = {}
+        # A client can be connected more than once, e.g. from two tabs sharing a session
+        self.active_connections: Dict[str, Set[WebSocket]] = {}
+        # Sessions ordered from least to most recently used
+        self.sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.session_locks: Dict[str, asyncio.Lock] = {}
+        # Responses keyed by (memory, input), ordered from least to most recently used
+        self.response_cache: "OrderedDict[tuple, str]" = OrderedDict()
     
     async def connect(self, websocket: WebSocket, client_id: str):
         await websocket.accept()
-        self.active_connections[client_id] = websocket
+        self.active_connections.setdefault(client_id, set()).add(websocket)
+        
+        # Create a new session for this client if it doesn't exist
+        await self.get_or_create_session(client_id)
+    
+    async def get_or_create_session(self, client_id: str):
+        """Get the session for a client, creating it exactly once per client."""
+        session = self.sessions.get(client_id)
+        if session is not None:
+            self.touch_session(client_id)
+            return session
         
-        # Create a new chain for this client if it doesn't exist
-        if client_id not in self.chat_chains:
-            flow_config = load_langflow_config()
-            self.chat_chains[client_id] = build_chain_from_langflow(flow_config, client_id)
+        # setdefault runs without yielding to the event loop, so all callers share one lock
+        lock = self.session_locks.setdefault(client_id, asyncio.Lock())
+        async with lock:
+            session = self.sessions.get(client_id)
+            if session is None:
+                self.evict_idle_sessions()
+                session = create_session()
+                self.sessions[client_id] = session
+            self.touch_session(client_id)
+        
+        return session
+    
+    def touch_session(self, client_id: str):
+        """Mark a session as most recently used."""
+        self.sessions[client_id]["last_seen"] = time.monotonic()
+        self.sessions.move_to_end(client_id)
+    
+    def evict_idle_sessions(self):
+        """Drop expired sessions, and the least recently used ones beyond MAX_SESSIONS."""
+        now = time.monotonic()
+        
+        for client_id in list(self.sessions):
+            over_capacity = len(self.sessions) >= MAX_SESSIONS
+            expired = now - self.sessions[client_id]["last_seen"] > SESSION_TTL_SECONDS
+            if not over_capacity and not expired:
+                # Sessions are ordered by last use, so the rest are newer
+                break
+            
+            # Never drop the session of a client that is still connected
+            if client_id in self.active_connections:
+                continue
+            
+            del self.sessions[client_id]
+            self.session_locks.pop(client_id, None)
+            logger.info(f"Evicted idle session {client_id}")
     
-    def disconnect(self, client_id: str):
-        if client_id in self.active_connections:
-            del self.active_connections[client_id]
+    def disconnect(self, websocket: WebSocket, client_id: str):
+        connections = self.active_connections.get(client_id)
+        if connections is not None:
+            connections.discard(websocket)
+            if not connections:
+                del self.active_connections[client_id]
         
-        # Keep the chain in memory for now
-        # In a production environment, you might want to clean up after some time
+        # Keep the session in memory so the client can reconnect; idle sessions
+        # are evicted once they expire or the session limit is reached
+        if client_id in self.sessions:
+            self.touch_session(client_id)
     
-    async def send_message(self, message: str, client_id: str):
-        if client_id in self.active_connections:
-            await self.active_connections[client_id].send_text(message)
+    async def send_message(self, message: Dict[str, Any], websocket: WebSocket):
+        # orjson encodes much faster than the stdlib json used by send_json
+        await websocket.send_text(orjson.dumps(message).decode())
     
-    async def process_message(self, message: str, client_id: str):
-        if client_id not in self.chat_chains:
-            flow_config = load_langflow_config()
-            self.chat_chains[client_id] = build_chain_from_langflow(flow_config, client_id)
+    def cache_response(self, cache_key: tuple, response: str):
+        """Remember a response, dropping the least recently used ones beyond RESPONSE_CACHE_SIZE."""
+        if RESPONSE_CACHE_SIZE <= 0:
+            return
         
-        chain_data = self.chat_chains[client_id]
-        chain = chain_data["chain"]
-        chat_history = chain_data["chat_history"]
+        self.response_cache[cache_key] = response
+        while len(self.response_cache) > RESPONSE_CACHE_SIZE:
+            self.response_cache.popitem(last=False)
+    
+    async def process_message(self, messages: List[str], client_id: str):
+        """
+        Process one or more user messages, yielding the response text as it is generated.
         
-        try:
-            # Add user message to history
-            chat_history.add_user_message(message)
-            
-            # Invoke the chain with the input
-            response = chain.invoke({"input": message})
-            
-            # Add AI response to history
-            chat_history.add_ai_message(response)
-            
-            return response
-        except Exception as e:
-            logger.error(f"Error processing message: {e}")
-            return f"I'm sorry, I encountered an error: {str(e)}"
+        Messages that queued up while the previous reply was being generated are
+        recorded one by one, then answered together.
+        """
+        session = await self.get_or_create_session(client_id)
+        chat_history = session["chat_history"]
+        message = "\n".join(messages)
+        
+        # Wait for any turn of this session that is still being answered, so the history stays in order
+        async with session["turn_lock"]:
+            try:
+                # Add the user messages to history
+                for user_message in messages:
+                    chat_history.add_user_message(user_message)
+                
+                # The same prompt gives (near enough) the same answer, so reuse it instead of calling the LLM;
+                # this mostly hits on common opening turns
+                cache_key = (chat_history.memory, message)
+                response = self.response_cache.get(cache_key)
+                if response is not None:
+                    self.response_cache.move_to_end(cache_key)
+                    yield response
+                else:
+                    # Stream the chain output as it arrives, without blocking the event loop
+                    response_chunks = []
+                    async for chunk in BASE_CHAIN.astream({"input": message, "memory": chat_history.memory}):
+                        response_chunks.append(chunk)
+                        yield chunk
+                    response = "".join(response_chunks)
+                    self.cache_response(cache_key, response)
+                
+                # Add AI response to history
+                chat_history.add_ai_message(response)
+            except Exception as e:
+                logger.error(f"Error processing message: {e}")
+                yield f"I'm sorry, I encountered an error: {str(e)}"
 
 # Create connection manager
 manager = ConnectionManager()
 
-# HTML template for the chat interface
+# HTML page for the chat interface; it doesn't depend on the request, so read it once
+with open("static/chat.html", "rb") as file:
+    CHAT_HTML_BYTES = file.read()
+CHAT_HTML_ETAG = f'"{hashlib.blake2b(CHAT_HTML_BYTES, digest_size=8).hexdigest()}"'
+CHAT_HTML_HEADERS = {"ETag": CHAT_HTML_ETAG, "Cache-Control": "public, max-age=3600"}
+
 @app.get("/", response_class=HTMLResponse)
 async def get_chat_page(request: Request):
-    # Create HTML template if it doesn't exist
-    html_template = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>LangFlow Memory Chatbot</title>
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <!-- Add Marked.js for Markdown rendering -->
-        <script src="https://cdn.jsdelivr.net/npm/marked/marked.min.js"></script>
-        <style>
-            :root {
-                --primary-color: #4a6fa5;
-                --secondary-color: #e6f7ff;
-                --background-color: #f5f5f5;
-                --card-background: #ffffff;
-                --text-color: #333333;
-                --message-user-bg: #e6f7ff;
-                --message-bot-bg: #f0f0f0;
-                --input-border: #dddddd;
-                --code-background: #f8f8f8;
-            }
-            
-            [data-theme="dark"] {
-                --primary-color: #5d87c6;
-                --secondary-color: #2c3e50;
-                --background-color: #1a1a1a;
-                --card-background: #2d2d2d;
-                --text-color: #f0f0f0;
-                --message-user-bg: #2c3e50;
-                --message-bot-bg: #3d3d3d;
-                --input-border: #444444;
-                --code-background: #383838;
-            }
-            
-            body {
-                font-family: Arial, sans-serif;
-                margin: 0;
-                padding: 0;
-                display: flex;
-                justify-content: center;
-                align-items: center;
-                min-height: 100vh;
-                background-color: var(--background-color);
-                color: var(--text-color);
-                transition: all 0.3s ease;
-            }
-            
-            .chat-container {
-                width: 90%;
-                max-width: 800px;
-                height: 90vh;
-                border-radius: 10px;
-                overflow: hidden;
-                box-shadow: 0 0 10px rgba(0,0,0,0.1);
-                display: flex;
-                flex-direction: column;
-                background-color: var(--card-background);
-            }
-            
-            .chat-header {
-                background-color: var(--primary-color);
-                color: white;
-                padding: 15px;
-                text-align: center;
-                display: flex;
-                justify-content: space-between;
-                align-items: center;
-            }
-            
-            .theme-toggle {
-                background: none;
-                border: none;
-                color: white;
-                cursor: pointer;
-                font-size: 1.2rem;
-            }
-            
-            .chat-messages {
-                flex: 1;
-                padding: 15px;
-                overflow-y: auto;
-                background-color: var(--card-background);
-            }
-            
-            .message {
-                margin-bottom: 15px;
-                padding: 12px;
-                border-radius: 8px;
-                max-width: 80%;
-                word-wrap: break-word;
-                position: relative;
-                animation: fadeIn 0.3s ease;
-            }
-            
-            @keyframes fadeIn {
-                from { opacity: 0; transform: translateY(10px); }
-                to { opacity: 1; transform: translateY(0); }
-            }
-            
-            .user-message {
-                background-color: var(--message-user-bg);
-                margin-left: auto;
-                color: var(--text-color);
-            }
-            
-            .bot-message {
-                background-color: var(--message-bot-bg);
-                margin-right: auto;
-                color: var(--text-color);
-            }
-            
-            .typing-indicator {
-                display: none;
-                background-color: var(--message-bot-bg);
-                margin-right: auto;
-                padding: 12px;
-                border-radius: 8px;
-                margin-bottom: 15px;
-            }
-            
-            .typing-indicator span {
-                height: 8px;
-                width: 8px;
-                background-color: var(--text-color);
-                display: inline-block;
-                border-radius: 50%;
-                margin-right: 5px;
-                animation: typing 1s infinite;
-            }
-            
-            .typing-indicator span:nth-child(2) {
-                animation-delay: 0.2s;
-            }
-            
-            .typing-indicator span:nth-child(3) {
-                animation-delay: 0.4s;
-                margin-right: 0;
-            }
-            
-            @keyframes typing {
-                0% { transform: translateY(0); }
-                50% { transform: translateY(-5px); }
-                100% { transform: translateY(0); }
-            }
-            
-            /* Add styles for Markdown content */
-            .bot-message img {
-                max-width: 100%;
-                height: auto;
-                margin: 10px 0;
-                border-radius: 5px;
-            }
-            
-            .bot-message h1, .bot-message h2, .bot-message h3, .bot-message h4 {
-                margin-top: 10px;
-                margin-bottom: 5px;
-                color: var(--text-color);
-            }
-            
-            .bot-message ul, .bot-message ol {
-                margin-left: 20px;
-            }
-            
-            .bot-message code {
-                background-color: var(--code-background);
-                padding: 2px 4px;
-                border-radius: 3px;
-                font-family: monospace;
-            }
-            
-            .bot-message pre {
-                background-color: var(--code-background);
-                padding: 10px;
-                border-radius: 5px;
-                overflow-x: auto;
-            }
-            
-            .bot-message table {
-                border-collapse: collapse;
-                width: 100%;
-                margin: 10px 0;
-            }
-            
-            .bot-message th, .bot-message td {
-                border: 1px solid var(--input-border);
-                padding: 8px;
-                text-align: left;
-            }
-            
-            .bot-message th {
-                background-color: var(--primary-color);
-                color: white;
-            }
-            
-            .chat-input {
-                display: flex;
-                padding: 15px;
-                background-color: var(--card-background);
-                border-top: 1px solid var(--input-border);
-            }
-            
-            .chat-input input {
-                flex: 1;
-                padding: 12px;
-                border: 1px solid var(--input-border);
-                border-radius: 5px;
-                margin-right: 10px;
-                background-color: var(--card-background);
-                color: var(--text-color);
-            }
-            
-            .chat-input button {
-                padding: 12px 20px;
-                background-color: var(--primary-color);
-                color: white;
-                border: none;
-                border-radius: 5px;
-                cursor: pointer;
-                transition: background-color 0.3s;
-            }
-            
-            .chat-input button:hover {
-                background-color: #3a5a84;
-            }
-            
-            .error-message {
-                background-color: #ffdddd;
-                color: #ff0000;
-                padding: 10px;
-                margin: 10px 0;
-                border-radius: 5px;
-                text-align: center;
-                display: none;
-            }
-            
-            /* Responsive design */
-            @media (max-width: 768px) {
-                .chat-container {
-                    width: 95%;
-                    height: 95vh;
-                }
-                
-                .message {
-                    max-width: 90%;
-                }
-            }
-        </style>
-    </head>
-    <body>
-        <div class="chat-container">
-            <div class="chat-header">
-                <h2>Memory Chatbot</h2>
-                <button class="theme-toggle" id="theme-toggle">🌓</button>
-            </div>
-            <div class="chat-messages" id="chat-messages">
-                <div class="message bot-message">
-                    Hi there! I'm your memory-enabled assistant. How can I help you today?
-                </div>
-            </div>
-            <div class="typing-indicator" id="typing-indicator">
-                <span></span>
-                <span></span>
-                <span></span>
-            </div>
-            <div class="error-message" id="error-message">
-                An error occurred. <button id="retry-button">Retry</button>
-            </div>
-            <div class="chat-input">
-                <input type="text" id="user-input" placeholder="Type your message here...">
-                <button id="send-button">Send</button>
-            </div>
-        </div>
-
-        <script>
-            // Theme toggle functionality
-            const themeToggle = document.getElementById('theme-toggle');
-            const body = document.body;
-            
-            // Check for saved theme preference or use preferred color scheme
-            const savedTheme = localStorage.getItem('theme') || 
-                (window.matchMedia('(prefers-color-scheme: dark)').matches ? 'dark' : 'light');
-            
-            // Apply the theme
-            if (savedTheme === 'dark') {
-                body.setAttribute('data-theme', 'dark');
-            }
-            
-            // Toggle theme
-            themeToggle.addEventListener('click', () => {
-                if (body.getAttribute('data-theme') === 'dark') {
-                    body.removeAttribute('data-theme');
-                    localStorage.setItem('theme', 'light');
-                } else {
-                    body.setAttribute('data-theme', 'dark');
-                    localStorage.setItem('theme', 'dark');
-                }
-            });
-            
-            // Generate a unique client ID
-            const clientId = Date.now().toString();
-            
-            // WebSocket connection
-            let socket;
-            let reconnectAttempts = 0;
-            const maxReconnectAttempts = 3;
-            
-            function connectWebSocket() {
-                socket = new WebSocket(`ws://${window.location.host}/ws/${clientId}`);
-                
-                // WebSocket event handlers
-                socket.onopen = () => {
-                    console.log('WebSocket connected');
-                    document.getElementById('error-message').style.display = 'none';
-                    reconnectAttempts = 0;
-                };
-                
-                socket.onmessage = (event) => {
-                    document.getElementById('typing-indicator').style.display = 'none';
-                    addMessage(event.data, 'bot');
-                };
-                
-                socket.onclose = (event) => {
-                    console.log('WebSocket closed:', event);
-                    if (reconnectAttempts < maxReconnectAttempts) {
-                        reconnectAttempts++;
-                        setTimeout(connectWebSocket, 1000 * reconnectAttempts);
-                    } else {
-                        document.getElementById('error-message').style.display = 'block';
-                    }
-                };
-                
-                socket.onerror = (error) => {
-                    console.error('WebSocket error:', error);
-                    document.getElementById('error-message').style.display = 'block';
-                };
-            }
-            
-            // Initial connection
-            connectWebSocket();
-            
-            // DOM elements
-            const chatMessages = document.getElementById('chat-messages');
-            const userInput = document.getElementById('user-input');
-            const sendButton = document.getElementById('send-button');
-            const retryButton = document.getElementById('retry-button');
-            const typingIndicator = document.getElementById('typing-indicator');
-            
-            // Retry connection
-            retryButton.addEventListener('click', () => {
-                document.getElementById('error-message').style.display = 'none';
-                reconnectAttempts = 0;
-                connectWebSocket();
-            });
-            
-            // Send message function
-            function sendMessage() {
-                const message = userInput.value.trim();
-                if (message) {
-                    // Add user message to chat
-                    addMessage(message, 'user');
-                    
-                    // Show typing indicator
-                    typingIndicator.style.display = 'block';
-                    
-                    // Send message to server if socket is open
-                    if (socket.readyState === WebSocket.OPEN) {
-                        socket.send(message);
-                    } else {
-                        document.getElementById('error-message').style.display = 'block';
-                        typingIndicator.style.display = 'none';
-                    }
-                    
-                    // Clear input
-                    userInput.value = '';
-                }
-            }
-            
-            // Add message to chat
-            function addMessage(message, sender) {
-                const messageElement = document.createElement('div');
-                messageElement.classList.add('message');
-                messageElement.classList.add(sender === 'user' ? 'user-message' : 'bot-message');
-                
-                // If it's a bot message, render markdown
-                if (sender === 'bot') {
-                    messageElement.innerHTML = marked.parse(message);
-                    
-                    // Make links open in new tab
-                    const links = messageElement.querySelectorAll('a');
-                    links.forEach(link => {
-                        link.setAttribute('target', '_blank');
-                        link.setAttribute('rel', 'noopener noreferrer');
-                    });
-                } else {
-                    messageElement.textContent = message;
-                }
-                
-                chatMessages.appendChild(messageElement);
-                
-                // Scroll to bottom
-                chatMessages.scrollTop = chatMessages.scrollHeight;
-            }
-            
-            // Event listeners
-            sendButton.addEventListener('click', sendMessage);
-            userInput.addEventListener('keypress', (e) => {
-                if (e.key === 'Enter') {
-                    sendMessage();
-                }
-            });
-            
-            // Focus input on page load
-            window.onload = () => {
-                userInput.focus();
-            };
-        </script>
-    </body>
-    </html>
-    """
+    # Let browsers and proxies revalidate their copy without downloading the page again
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match and CHAT_HTML_ETAG in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=CHAT_HTML_HEADERS)
     
-    # Write HTML template to file
-    with open("templates/chat.html", "w") as file:
-        file.write(html_template)
-    
-    return templates.TemplateResponse("chat.html", {"request": request})
+    return Response(CHAT_HTML_BYTES, media_type="text/html", headers=CHAT_HTML_HEADERS)
+
+# How long streamed tokens are collected into one WebSocket frame (0 sends every chunk on its own)
+STREAM_FLUSH_INTERVAL = float(os.getenv('STREAM_FLUSH_INTERVAL', '0.02'))
+
+# Maximum number of received messages waiting to be answered for one client
+MESSAGE_QUEUE_SIZE = int(os.getenv('MESSAGE_QUEUE_SIZE', '8'))
+
+def drain_queue(queue: asyncio.Queue, first: str) -> List[str]:
+    """Return a message together with every message already queued behind it."""
+    messages = [first]
+    while not queue.empty():
+        messages.append(queue.get_nowait())
+    return messages
+
+async def answer_messages(queue: asyncio.Queue, websocket: WebSocket, client_id: str):
+    """Answer the messages queued on one connection in order, streaming each response back to it."""
+    try:
+        while True:
+            # A lone message is answered right away; a backlog that built up during
+            # the previous reply is answered in one turn, without waiting for more
+            messages = drain_queue(queue, await queue.get())
+            
+            # Process messages and stream the response back to the client, coalescing the tokens
+            # that arrive within STREAM_FLUSH_INTERVAL into a single frame
+            pending: List[str] = []
+            flushed_at = time.monotonic()
+            # aclosing releases the session's turn lock right away if this task is cancelled mid-reply
+            async with contextlib.aclosing(manager.process_message(messages, client_id)) as response:
+                async for chunk in response:
+                    pending.append(chunk)
+                    if time.monotonic() - flushed_at >= STREAM_FLUSH_INTERVAL:
+                        await manager.send_message({"type": "chunk", "content": "".join(pending)}, websocket)
+                        pending.clear()
+                        flushed_at = time.monotonic()
+            
+            if pending:
+                await manager.send_message({"type": "chunk", "content": "".join(pending)}, websocket)
+            
+            # Let the client know the response is complete
+            await manager.send_message({"type": "done"}, websocket)
+            for _ in messages:
+                queue.task_done()
+    except Exception:
+        # Returning ends the connection; see websocket_endpoint
+        logger.exception(f"Error answering client {client_id}")
+
+async def receive_messages(websocket: WebSocket, queue: asyncio.Queue):
+    """Put the client's messages on the queue until it disconnects."""
+    while True:
+        # Receive message from client; messages that arrive during a reply are answered together
+        data = await websocket.receive_text()
+        # Blocks while the queue is full, which stops reading from the socket so
+        # TCP flow control slows down a client that sends faster than it is answered
+        await queue.put(data)
 
 # WebSocket endpoint for chat
 @app.websocket("/ws/{client_id}")
 async def websocket_endpoint(websocket: WebSocket, client_id: str):
     await manager.connect(websocket, client_id)
     
+    # Answer in a separate task so the socket keeps being read during slow LLM calls
+    queue: asyncio.Queue = asyncio.Queue(maxsize=MESSAGE_QUEUE_SIZE)
+    receiver = asyncio.create_task(receive_messages(websocket, queue))
+    worker = asyncio.create_task(answer_messages(queue, websocket, client_id))
+    
     try:
-        while True:
-            # Receive message from client
-            data = await websocket.receive_text()
-            
-            # Process message
-            response = await manager.process_message(data, client_id)
-            
-            # Send response back to client
-            await manager.send_message(response, client_id)
-            
+        # Run until the client disconnects or answering fails, whichever comes first
+        await asyncio.wait({receiver, worker}, return_when=asyncio.FIRST_COMPLETED)
+        
+        if receiver.done():
+            receiver.result()
+        else:
+            # The worker failed, so nothing would answer this client any more
+            with contextlib.suppress(Exception):
+                await websocket.close(code=1011)
     except WebSocketDisconnect:
-        manager.disconnect(client_id)
         logger.info(f"Client {client_id} disconnected")
+    except Exception:
+        logger.exception(f"Error receiving from client {client_id}")
+    finally:
+        manager.disconnect(websocket, client_id)
+        receiver.cancel()
+        worker.cancel()
+        await asyncio.wait({receiver, worker})
 
 # Run the app
 if __name__ == "__main__":
+    import uvicorn
+    
+    # Chat sessions live in process memory, so a single worker serves every client; uvicorn[standard]
+    # already picks uvloop and httptools wherever they are installed
     logger.info("Starting web interface for LangFlow Memory Chatbot")
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000)